@@ -3,19 +3,21 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from dotenv import load_dotenv
 from os import getenv
+from schemas import ReviewAnalysis
+from structured import structured_chain
 
 load_dotenv()
 
 # Initialize model (OpenRouter)
 model = init_chat_model(
-    model="xiaomi/mimo-v2-flash:free",
+    model=getenv("LLM_MODEL", "xiaomi/mimo-v2-flash:free"),
     model_provider="openai",
-    base_url="https://openrouter.ai/api/v1",
+    base_url=getenv("LLM_BASE_URL", "https://openrouter.ai/api/v1"),  # benchmarks/ overrides this
     api_key=getenv("OPENROUTER_API_KEY"),
     temperature=0.1
 )
 
-# JSON output parser
+# JSON output parser (streaming chain only)
 parser = JsonOutputParser()
 
 # SYSTEM PROMPT (instructions only)
@@ -43,6 +45,9 @@ Your task is to generate THREE things:
    - Do NOT mention internal analysis.
    - Tone should align with the rating.
 
+"""
+
+output_format = """
 Return ONLY valid JSON in this format:
 {{
   "ai_summary": "<string>",
@@ -51,11 +56,50 @@ Return ONLY valid JSON in this format:
 }}
 """
 
+# Streaming variant: the user-facing reply comes first so it can be shown
+# while the admin-only fields are still being generated.
+stream_output_format = """
+Return ONLY valid JSON in this format, with the keys in exactly this order:
+{{
+  "ai_user_response": "<string>",
+  "ai_summary": "<string>",
+  "ai_recommended_action": "<string>"
+}}
+"""
+
 # Prompt template
 prompt = ChatPromptTemplate.from_messages([
-    ("system", system_prompt),
+    ("system", system_prompt + output_format),
     ("human", "Rating: {rating}\nReview: {review}")
 ])
 
-# Chain = prompt → model → JSON parser
-chain = prompt | model | parser
+# Chain = prompt → model → validated JSON (repair / targeted re-ask, see structured.py)
+chain = structured_chain("review", prompt, model, ReviewAnalysis)
+
+stream_prompt = ChatPromptTemplate.from_messages([
+    ("system", system_prompt + stream_output_format),
+    ("human", "Rating: {rating}\nReview: {review}")
+])
+
+# Same chain for /api/reviews/stream; .stream() yields progressively
+# completed dicts as JSON tokens arrive
+stream_chain = stream_prompt | model | parser
+
+
+# Canned reply used whenever the LLM can't (or won't) be called
+FALLBACK_USER_RESPONSE = "Thank you for your feedback."
+
+# LLM call failed
+FALLBACK_OUTPUT = {
+    "ai_summary": "Summary unavailable.",
+    "ai_recommended_action": "Manual review recommended.",
+    "ai_user_response": FALLBACK_USER_RESPONSE
+}
+
+# LLM skipped because we're over capacity: NULL AI fields mark the review as
+# pending enrichment
+PENDING_OUTPUT = {
+    "ai_summary": None,
+    "ai_recommended_action": None,
+    "ai_user_response": FALLBACK_USER_RESPONSE
+}
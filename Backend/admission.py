@@ -0,0 +1,165 @@
+"""
+Admission control for POST /api/reviews.
+
+- Per-client token buckets reject bursts early with 429 + Retry-After.
+- EnrichmentLimiter caps concurrent LLM enrichments and bounds how many
+  requests may wait for a slot. When both are full the request is rejected
+  (503 + Retry-After) or, in degraded mode, stored without AI fields and
+  answered with the canned reply.
+
+Submissions run in FastAPI's threadpool, so both use threading primitives.
+"""
+from fastapi import HTTPException, Request
+from dotenv import load_dotenv
+from collections import OrderedDict
+import math
+import os
+import threading
+import time
+
+load_dotenv()
+
+# Max concurrent LLM enrichments across the process
+MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "8"))
+# Max requests waiting for an enrichment slot; beyond this we answer immediately
+MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "16"))
+# Max seconds a queued request waits for a slot
+QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+# Store + canned reply instead of 503 when over capacity
+DEGRADED_MODE = os.getenv("ADMISSION_DEGRADED_MODE", "true").lower() == "true"
+# Retry-After sent with 503 responses
+RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER", "5"))
+
+# Per-client token bucket: sustained rate (0, the default, disables) and burst
+# size. Clients are keyed by request.client.host, which uvicorn only resolves
+# to the real client behind a proxy (e.g. Render) when FORWARDED_ALLOW_IPS
+# lists it (serve.py). Otherwise every user shares the proxy's bucket.
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "0"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "5"))
+# Hard cap on stored buckets; the least recently used bucket is evicted beyond it
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+
+
+class TokenBucketLimiter:
+    """Token bucket per client key. Thread-safe, at most max_clients buckets."""
+
+    def __init__(self, rate_per_second: float, burst: int, max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.rate = rate_per_second
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()  # key -> (tokens, last_refill), least recently used first
+        self._lock = threading.Lock()
+
+    def try_acquire(self, key: str) -> float:
+        """Take one token. Returns 0 on success, else seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            acquired = tokens >= 1
+            if acquired:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            # O(1) eviction; an evicted client just starts again with a full bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            return 0.0 if acquired else (1 - tokens) / self.rate
+
+
+class EnrichmentLimiter:
+    """Caps in-flight LLM calls with a bounded, time-limited wait queue."""
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._in_flight = 0
+        self._waiting = 0
+        self._rejected = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> bool:
+        """Take a slot, waiting in the queue if there is room. False if over capacity."""
+        with self._cond:
+            # Don't jump ahead of requests that are already waiting
+            if self._waiting == 0 and self._in_flight < self.max_in_flight:
+                self._in_flight += 1
+                return True
+            if self._waiting >= self.max_queue:
+                self._rejected += 1
+                return False
+
+            self._waiting += 1
+            try:
+                acquired = self._cond.wait_for(
+                    lambda: self._in_flight < self.max_in_flight,
+                    timeout=self.queue_timeout
+                )
+            finally:
+                self._waiting -= 1
+
+            if acquired:
+                self._in_flight += 1
+            else:
+                self._rejected += 1
+            return acquired
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free and nobody is waiting. For background work."""
+        with self._cond:
+            if self._waiting == 0 and self._in_flight < self.max_in_flight:
+                self._in_flight += 1
+                return True
+            return False
+
+    def has_capacity(self) -> bool:
+        """True if acquire() would not be rejected outright (a slot or queue space is free)."""
+        with self._cond:
+            return self._in_flight < self.max_in_flight or self._waiting < self.max_queue
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "rejected": self._rejected,
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+            }
+
+
+review_rate_limiter = (
+    TokenBucketLimiter(RATE_LIMIT_PER_MINUTE / 60, RATE_LIMIT_BURST)
+    if RATE_LIMIT_PER_MINUTE > 0 else None
+)
+enrichment_limiter = EnrichmentLimiter(MAX_IN_FLIGHT, MAX_QUEUE, QUEUE_TIMEOUT)
+
+
+def client_key(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit_reviews(request: Request):
+    """Dependency: 429 with Retry-After when the client exceeds its review rate."""
+    if review_rate_limiter is None:
+        return
+    retry_after = review_rate_limiter.try_acquire(client_key(request))
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many reviews submitted. Please try again shortly.",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+
+def over_capacity_error():
+    return HTTPException(
+        status_code=503,
+        detail="Service is busy. Please try again shortly.",
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+    )
@@ -1,23 +1,21 @@
 from langchain.chat_models import init_chat_model
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
 from dotenv import load_dotenv
 from os import getenv
+from schemas import SentimentAnalysis, SentimentDigest, RecommendationPriority
+from structured import structured_chain
 
 load_dotenv()
 
 # Initialize model (same as Prediction.py)
 model = init_chat_model(
-    model="xiaomi/mimo-v2-flash:free",
+    model=getenv("LLM_MODEL", "xiaomi/mimo-v2-flash:free"),
     model_provider="openai",
-    base_url="https://openrouter.ai/api/v1",
+    base_url=getenv("LLM_BASE_URL", "https://openrouter.ai/api/v1"),
     api_key=getenv("OPENROUTER_API_KEY"),
     temperature=0.1
 )
 
-# JSON output parser
-parser = JsonOutputParser()
-
 # ===== OVERALL SENTIMENT CHAIN =====
 sentiment_system_prompt = """
 You are an AI analytics assistant helping a business understand overall customer sentiment.
@@ -59,7 +57,7 @@ sentiment_prompt = ChatPromptTemplate.from_messages([
 ])
 
 # Chain for sentiment analysis
-sentiment_chain = sentiment_prompt | model | parser
+sentiment_chain = structured_chain("sentiment", sentiment_prompt, model, SentimentAnalysis)
 
 
 # ===== RECOMMENDATION PRIORITY CHAIN =====
@@ -67,12 +65,15 @@ priority_system_prompt = """
 You are an AI assistant helping a business prioritize action items from customer feedback.
 
 You will be given a list of AI-generated recommendations based on customer reviews.
+Similar recommendations have already been grouped: each line is one representative
+recommendation with how many times it was mentioned and the average rating of
+the reviews it came from.
 
 Your task is to:
 1. Analyze all recommendations
 2. Group similar recommendations together
 3. Prioritize them based on:
-   - Frequency (how often the issue appears)
+   - Frequency (how often the issue appears, from the mention counts)
    - Impact (how much it affects customer satisfaction)
    - Urgency (how quickly it should be addressed)
 
@@ -111,4 +112,61 @@ priority_prompt = ChatPromptTemplate.from_messages([
 ])
 
 # Chain for priority analysis
-priority_chain = priority_prompt | model | parser
+priority_chain = structured_chain("priority", priority_prompt, model, RecommendationPriority)
+
+
+# ===== SENTIMENT MAP-REDUCE CHAINS =====
+# Used by sentiment_rollup.py to cover the full review history: each chunk of
+# reviews is summarized once (map), and chunk summaries are merged (reduce).
+chunk_summary_system_prompt = """
+You are an AI analytics assistant summarizing one slice of a business's customer reviews.
+
+You will be given a batch of reviews. Each review contains:
+- rating: The star rating (1-5)
+- ai_summary: A concise summary of the review
+
+Your task is to condense the batch into a short digest that will later be merged
+with digests of other batches:
+
+1. sentiment_score:
+   - A numerical score from 0-100 representing satisfaction within this batch
+
+2. key_themes:
+   - A list of up to 5 short theme phrases seen in this batch
+
+3. summary:
+   - 2-3 sentences describing what customers praised and complained about
+
+Return ONLY valid JSON in this format:
+{{
+  "sentiment_score": <number 0-100>,
+  "key_themes": ["<theme1>", "<theme2>"],
+  "summary": "<string>"
+}}
+"""
+
+chunk_summary_prompt = ChatPromptTemplate.from_messages([
+    ("system", chunk_summary_system_prompt),
+    ("human", "Summarize this batch of reviews:\n\n{reviews_data}")
+])
+
+# Map step: one batch of reviews -> digest
+chunk_summary_chain = structured_chain("sentiment_chunk", chunk_summary_prompt, model, SentimentDigest)
+
+chunk_merge_prompt = ChatPromptTemplate.from_messages([
+    ("system", chunk_summary_system_prompt),
+    ("human", "These are digests of consecutive review batches. "
+              "Merge them into a single digest, weighting each by its review count:\n\n{digests_data}")
+])
+
+# Intermediate reduce step: several digests -> one digest (same format)
+chunk_merge_chain = structured_chain("sentiment_merge", chunk_merge_prompt, model, SentimentDigest)
+
+sentiment_reduce_prompt = ChatPromptTemplate.from_messages([
+    ("system", sentiment_system_prompt),
+    ("human", "Analyze the reviews described by these digests of review batches. "
+              "Weight each digest by its review count:\n\n{digests_data}")
+])
+
+# Final reduce step: digests -> overall sentiment (same format as sentiment_chain)
+sentiment_reduce_chain = structured_chain("sentiment_reduce", sentiment_reduce_prompt, model, SentimentAnalysis)
@@ -1,6 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from datetime import datetime
+from typing import List, Optional
+import anyio
+import orjson
+import json
 import uuid
 
 from schemas import (
@@ -9,53 +16,69 @@ from schemas import (
     SentimentAnalysisResponse, 
     RecommendationPriorityResponse,
     RatingsDataResponse,
-    AllReviewsResponse
+    AllReviewsResponse,
+    ReviewSearchResponse,
+    ReviewAnalysis,
+    LLMParseStatsResponse,
+    ScheduledJobsResponse
 )
-from models import Review
+from models import Review, ScheduledJob, REVIEW_DETAIL_COLUMNS
 from database import get_db
-from Prediction import chain  # your LangChain chain
+from Prediction import chain, stream_chain, stream_prompt, model  # your LangChain chains
+from Prediction import FALLBACK_OUTPUT, PENDING_OUTPUT
 from analytics import sentiment_chain, priority_chain  # analytics chains
+from sentiment_rollup import hierarchical_sentiment, CHUNK_BY_OPTIONS
+from recommendation_clusters import cluster_recommendations
+from search import search_reviews
+from export import export_reviews, EXPORT_MEDIA_TYPES
+from structured import complete_output, parse_stats, STRUCTURED_OUTPUT_MODE
+from admission import rate_limit_reviews, enrichment_limiter, over_capacity_error, DEGRADED_MODE
 
 router = APIRouter(prefix="/api")
 
-@router.post("/reviews", response_model=ReviewCreateResponse)
-def submit_review(data: ReviewCreate, db: Session = Depends(get_db)):
 
-    # Guard: long review
-    if data.review and len(data.review) > 2000:
-        raise HTTPException(status_code=400, detail="Review too long")
-
-    # --- LLM call (server-side only) ---
-    try:
-        llm_output = chain.invoke({
-            "rating": data.rating,
-            "review": data.review
-        })
-    except Exception:
-        llm_output = {
-            "ai_summary": "Summary unavailable.",
-            "ai_recommended_action": "Manual review recommended.",
-            "ai_user_response": "Thank you for your feedback."
-        }
-
-    # --- Backend-owned fields ---
-    review_id = uuid.uuid4()
-    created_at = datetime.utcnow()
-
-    # --- Persist EVERYTHING (admin + user data) ---
+def _save_review(db: Session, data: ReviewCreate, llm_output: dict):
+    # --- Persist EVERYTHING (admin + user data) with backend-owned fields ---
     review = Review(
-        id=review_id,
+        id=uuid.uuid4(),
         rating=data.rating,
         review_text=data.review,
         ai_summary=llm_output["ai_summary"],                  # admin-only
         ai_recommended_action=llm_output["ai_recommended_action"],  # admin-only
         ai_response=llm_output["ai_user_response"],           # user-facing
-        created_at=created_at
+        created_at=datetime.utcnow()
     )
 
     db.add(review)
     db.commit()
 
+
+@router.post("/reviews", response_model=ReviewCreateResponse, dependencies=[Depends(rate_limit_reviews)])
+def submit_review(data: ReviewCreate, db: Session = Depends(get_db)):
+
+    # Guard: long review
+    if data.review and len(data.review) > 2000:
+        raise HTTPException(status_code=400, detail="Review too long")
+
+    # --- Admission control: bounded LLM concurrency (see admission.py) ---
+    if enrichment_limiter.acquire():
+        # --- LLM call (server-side only) ---
+        try:
+            llm_output = chain.invoke({
+                "rating": data.rating,
+                "review": data.review
+            })
+        except Exception:
+            llm_output = FALLBACK_OUTPUT
+        finally:
+            enrichment_limiter.release()
+    elif DEGRADED_MODE:
+        llm_output = PENDING_OUTPUT
+    else:
+        raise over_capacity_error()
+
+    _save_review(db, data, llm_output)
+
     # --- User response (NO summary, NO recommendation) ---
     return {
         "success": True,
@@ -63,15 +86,173 @@ def submit_review(data: ReviewCreate, db: Session = Depends(get_db)):
     }
 
 
+def _sse(event: str, payload: dict):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _fill_missing(llm_output: dict, defaults: dict):
+    # Fill anything the model didn't produce (error or truncated JSON)
+    return {
+        key: llm_output.get(key) if isinstance(llm_output.get(key), str) and llm_output.get(key) else default
+        for key, default in defaults.items()
+    }
+
+
+def _save_pending_review(db: Session, data: ReviewCreate):
+    try:
+        _save_review(db, data, PENDING_OUTPUT)
+    except Exception:
+        db.rollback()
+
+
+async def _stream_review_events(data: ReviewCreate, db: Session):
+    """
+    SSE generator for /reviews/stream: `token` events carry ai_user_response
+    deltas as the model produces them; `done` is sent once the full output
+    (summary + recommendation) is persisted.
+
+    Runs on the event loop; blocking steps (limiter wait, re-ask, DB) go to
+    the threadpool. A client disconnect cancels it (or closes it, see
+    _ClosingStreamingResponse), which stops the LLM stream and runs the
+    cleanup right away.
+    """
+    llm_output = {}
+    defaults = FALLBACK_OUTPUT
+    finished = False
+    try:
+        if await run_in_threadpool(enrichment_limiter.acquire):
+            sent = ""
+            inputs = {"rating": data.rating, "review": data.review}
+            try:
+                async for partial in stream_chain.astream(inputs):
+                    if not isinstance(partial, dict):
+                        continue
+                    llm_output = partial
+                    reply = partial.get("ai_user_response")
+                    # Partial JSON only ever extends the string being generated
+                    if isinstance(reply, str) and len(reply) > len(sent) and reply.startswith(sent):
+                        yield _sse("token", {"delta": reply[len(sent):]})
+                        sent = reply
+                # Truncated or invalid JSON: re-ask only for the missing fields
+                try:
+                    llm_output = await run_in_threadpool(
+                        complete_output,
+                        "review_stream", model, stream_prompt.invoke(inputs).to_messages(),
+                        ReviewAnalysis, llm_output
+                    )
+                except Exception:
+                    # Re-ask failed too. Keep what was streamed (the user has
+                    # already read the reply) and leave missing AI fields NULL
+                    # so the enrich_pending job fills them in. The stream
+                    # stopped early, so an admin field it ended on may be cut off.
+                    last_field = next(reversed(llm_output), None)
+                    if last_field != "ai_user_response":
+                        llm_output.pop(last_field, None)
+                    defaults = PENDING_OUTPUT
+            except Exception:
+                llm_output = {}
+            finally:
+                enrichment_limiter.release()
+        elif DEGRADED_MODE:
+            defaults = PENDING_OUTPUT
+        else:
+            finished = True
+            yield _sse("error", {"detail": "Service is busy. Please try again shortly."})
+            return
+
+        llm_output = _fill_missing(llm_output, defaults)
+        finished = True
+        try:
+            await run_in_threadpool(_save_review, db, data, llm_output)
+        except Exception:
+            db.rollback()
+            yield _sse("error", {"detail": "Failed to save review"})
+            return
+
+        # The final message is authoritative (e.g. canned reply after a failed stream)
+        yield _sse("done", {"success": True, "message": llm_output["ai_user_response"]})
+    finally:
+        if not finished:
+            # Client went away mid-stream: the reply may be cut off, so store the
+            # review as pending (NULL AI fields) for the enrich_pending job.
+            # Shielded, or the pending cancellation would abort the save too.
+            with anyio.CancelScope(shield=True):
+                await run_in_threadpool(_save_pending_review, db, data)
+
+
+class _ClosingStreamingResponse(StreamingResponse):
+    """
+    Closes the body generator as soon as the response ends. On a client
+    disconnect Starlette only cancels the send loop, so a generator paused at
+    a yield would otherwise wait for garbage collection to run its cleanup.
+    """
+
+    async def stream_response(self, send):
+        try:
+            await super().stream_response(send)
+        finally:
+            with anyio.CancelScope(shield=True):
+                await self.body_iterator.aclose()
+
+
+@router.post("/reviews/stream", dependencies=[Depends(rate_limit_reviews)])
+def submit_review_stream(data: ReviewCreate, db: Session = Depends(get_db)):
+    """
+    User endpoint: Same as POST /reviews, but streams the AI reply to the
+    browser as Server-Sent Events while the model is still generating.
+    """
+
+    # Guard: long review
+    if data.review and len(data.review) > 2000:
+        raise HTTPException(status_code=400, detail="Review too long")
+
+    # Fail fast while a status code can still be sent; the slot itself is
+    # taken inside the generator so it is always released
+    if not DEGRADED_MODE and not enrichment_limiter.has_capacity():
+        raise over_capacity_error()
+
+    return _ClosingStreamingResponse(
+        _stream_review_events(data, db),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/analytics/sentiment", response_model=SentimentAnalysisResponse)
-def get_overall_sentiment(db: Session = Depends(get_db)):
+def get_overall_sentiment(
+    mode: str = Query("recent", pattern="^(recent|all)$"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    chunk_by: str = Query("size", pattern=f"^({'|'.join(CHUNK_BY_OPTIONS)})$"),
+    db: Session = Depends(get_db)
+):
     """
-    Admin endpoint: Analyzes the last 20 reviews for overall sentiment.
-    Uses rating, review_text, and ai_summary to generate insights.
+    Admin endpoint: Analyzes overall sentiment.
+    - mode=recent (default): the last 20 reviews in a single prompt.
+    - mode=all: every review in [start_date, end_date) via map-reduce over
+      cached chunk digests (see sentiment_rollup.py). Chunks hold up to 50
+      reviews of one calendar month, or of one day with chunk_by=day; use day
+      for ranges that don't start on a month boundary so digests are shared.
     """
+
+    if mode == "all":
+        try:
+            sentiment_output = hierarchical_sentiment(db, start_date, end_date, chunk_by)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to analyze sentiment: {str(e)}"
+            )
+
+        if sentiment_output is None:
+            raise HTTPException(status_code=404, detail="No reviews found")
+
+        return sentiment_output
     
-    # Get last 20 reviews from database
-    reviews = db.query(Review).order_by(Review.created_at.desc()).limit(20).all()
+    # Get last 20 enriched reviews from database
+    reviews = db.query(Review).filter(
+        Review.ai_summary.isnot(None)
+    ).order_by(Review.created_at.desc()).limit(20).all()
     
     if not reviews:
         raise HTTPException(status_code=404, detail="No reviews found")
@@ -105,24 +286,36 @@ def get_overall_sentiment(db: Session = Depends(get_db)):
 
 
 @router.get("/analytics/recommendations", response_model=RecommendationPriorityResponse)
-def get_priority_recommendations(db: Session = Depends(get_db)):
+def get_priority_recommendations(
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db)
+):
     """
-    Admin endpoint: Analyzes the last 50 AI-generated recommendations and creates a priority list.
+    Admin endpoint: Analyzes AI-generated recommendations and creates a priority list.
+    Covers the whole history (or the latest `limit` recommendations). Similar
+    recommendations are clustered locally first, so the LLM only sees one
+    representative per cluster with its frequency and average rating.
     """
     
-    # Get last 50 reviews with recommendations
-    reviews = db.query(Review).filter(
+    # Only the two columns clustering needs, newest first
+    query = db.query(Review.ai_recommended_action, Review.rating).filter(
         Review.ai_recommended_action.isnot(None)
-    ).order_by(Review.created_at.desc()).limit(50).all()
+    ).order_by(Review.created_at.desc())
+    if limit:
+        query = query.limit(limit)
+    rows = query.all()
     
-    if not reviews:
+    if not rows:
         raise HTTPException(status_code=404, detail="No recommendations found")
     
-    # Format recommendations data for LLM
+    clusters = cluster_recommendations(rows)
+    
+    # Format cluster representatives for LLM
     recommendations_data = []
-    for i, review in enumerate(reviews, 1):
+    for i, cluster in enumerate(clusters, 1):
         recommendations_data.append(
-            f"{i}. (Rating: {review.rating}/5) {review.ai_recommended_action}"
+            f"{i}. (Mentioned {cluster['count']}x, Avg rating: {cluster['average_rating']:.1f}/5) "
+            f"{cluster['representative']}"
         )
     
     recommendations_text = "\n".join(recommendations_data)
@@ -134,7 +327,7 @@ def get_priority_recommendations(db: Session = Depends(get_db)):
         })
         
         # Add total count
-        priority_output["total_recommendations_analyzed"] = len(reviews)
+        priority_output["total_recommendations_analyzed"] = len(rows)
         
         return priority_output
         
@@ -146,46 +339,194 @@ def get_priority_recommendations(db: Session = Depends(get_db)):
 
 
 @router.get("/analytics/ratings", response_model=RatingsDataResponse)
-def get_all_ratings(db: Session = Depends(get_db)):
+def get_all_ratings(include_ratings: bool = True, db: Session = Depends(get_db)):
     """
     Admin endpoint: Returns all ratings for visualization.
     Useful for creating charts, histograms, and trend analysis.
+    Counts and average are computed in SQL; with include_ratings=false the
+    per-review list is skipped, so the response size doesn't grow with the table.
     """
     
-    # Get all reviews
-    reviews = db.query(Review).all()
+    rating_counts = dict(
+        db.query(Review.rating, func.count(Review.id)).group_by(Review.rating).all()
+    )
+    total_reviews = sum(rating_counts.values())
     
-    if not reviews:
+    if not total_reviews:
         raise HTTPException(status_code=404, detail="No reviews found")
     
-    # Extract all ratings
-    ratings = [review.rating for review in reviews]
-    
     # Calculate average
-    average_rating = sum(ratings) / len(ratings)
+    average_rating = sum(rating * count for rating, count in rating_counts.items()) / total_reviews
+    
+    # Extract all ratings
+    ratings = db.scalars(select(Review.rating)).all() if include_ratings else []
     
     return {
         "ratings": ratings,
-        "total_reviews": len(ratings),
-        "average_rating": round(average_rating, 2)
+        "total_reviews": total_reviews,
+        "average_rating": round(average_rating, 2),
+        "rating_counts": rating_counts
     }
 
 
 @router.get("/admin/reviews", response_model=AllReviewsResponse)
-def get_all_reviews(db: Session = Depends(get_db)):
+def get_all_reviews(
+    fast: bool = False,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    ids: Optional[List[uuid.UUID]] = Query(None, max_length=100),
+    db: Session = Depends(get_db)
+):
     """
     Admin endpoint: Returns all reviews sorted by newest first.
     Includes full details: rating, review text, AI analysis, and timestamps.
+    With fast=true, rows are serialized straight from the SQL result with
+    orjson, skipping ORM object construction and Pydantic re-validation.
+    
+    Paging for the admin dashboard: limit/offset select a page, since returns
+    only reviews created after a timestamp (new-review polling) and until pins
+    pages to a snapshot so offsets don't shift as reviews arrive. When any of
+    these is set, total_count counts every matching review, not just the page,
+    and an empty result is not an error.
+
+    created_at is set just before the insert commits, so a review can appear
+    after a newer one: poll with since a little before the newest review seen
+    and skip ids already shown (admin.js uses a 15 second overlap).
+
+    ids (repeatable, up to 100) returns just those reviews, so the dashboard
+    can re-read rows still waiting for AI analysis.
     """
     
-    # Get all reviews, sorted by created_at descending (newest first)
-    reviews = db.query(Review).order_by(Review.created_at.desc()).all()
+    filters = []
+    if since:
+        filters.append(Review.created_at > since)
+    if until:
+        filters.append(Review.created_at <= until)
+    if ids:
+        filters.append(Review.id.in_(ids))
+    paged = limit is not None or bool(filters)
+    # id breaks created_at ties so pages never overlap
+    order = (Review.created_at.desc(), Review.id.desc())
     
-    if not reviews:
+    if fast:
+        query = select(*REVIEW_DETAIL_COLUMNS).where(*filters).order_by(*order)
+        if limit is not None:
+            query = query.limit(limit).offset(offset)
+        rows = db.execute(query).mappings().all()
+        reviews = [dict(row) for row in rows]
+    else:
+        # Get all reviews, sorted by created_at descending (newest first)
+        query = db.query(Review).filter(*filters).order_by(*order)
+        if limit is not None:
+            query = query.limit(limit).offset(offset)
+        reviews = query.all()
+    
+    if limit is not None:
+        total_count = db.query(func.count(Review.id)).filter(*filters).scalar()
+    else:
+        total_count = len(reviews)
+    
+    if not reviews and not paged:
         raise HTTPException(status_code=404, detail="No reviews found")
     
+    if fast:
+        return Response(
+            content=orjson.dumps({
+                "reviews": reviews,
+                "total_count": total_count
+            }),
+            media_type="application/json"
+        )
+    
     return {
         "reviews": reviews,
-        "total_count": len(reviews)
+        "total_count": total_count
     }
 
+
+@router.get("/admin/reviews/export")
+def export_all_reviews(
+    format: str = Query("csv", pattern=f"^({'|'.join(EXPORT_MEDIA_TYPES)})$"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Admin endpoint: Streams reviews in [start_date, end_date), oldest first,
+    as CSV, JSONL or Parquet. Rows come from a server-side cursor in batches,
+    so memory use does not grow with the table.
+    """
+    
+    filename = f"reviews-{datetime.utcnow():%Y%m%d%H%M%S}.{format}"
+    
+    return StreamingResponse(
+        export_reviews(db, format, start_date, end_date),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/admin/reviews/search", response_model=ReviewSearchResponse)
+def search_all_reviews(
+    q: str = Query(..., min_length=1, max_length=200),
+    min_rating: Optional[int] = Query(None, ge=1, le=5),
+    max_rating: Optional[int] = Query(None, ge=1, le=5),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Admin endpoint: Full-text search over review text, AI summary and recommended action.
+    Uses the indexed search column (see search.py); results are ranked by
+    relevance, then newest first. q accepts web-search syntax: "phrases", OR,
+    and -term to exclude a term. total_count stops at 1000 matches
+    (SEARCH_COUNT_LIMIT), with total_count_capped set.
+    """
+    
+    results, total_count, total_count_capped = search_reviews(
+        db,
+        q,
+        min_rating=min_rating,
+        max_rating=max_rating,
+        start_date=start_date,
+        end_date=end_date,
+        limit=page_size,
+        offset=(page - 1) * page_size
+    )
+    
+    return {
+        "results": results,
+        "total_count": total_count,
+        "total_count_capped": total_count_capped,
+        "page": page,
+        "page_size": page_size
+    }
+
+
+@router.get("/admin/llm-stats", response_model=LLMParseStatsResponse)
+def get_llm_parse_stats():
+    """
+    Admin endpoint: Per-chain LLM output counters since process start:
+    calls, native (provider structured output), parsed, repaired (fixed
+    locally), reasked (targeted re-ask for missing fields) and failed.
+    """
+    
+    return {
+        "mode": STRUCTURED_OUTPUT_MODE,
+        "chains": parse_stats.snapshot()
+    }
+
+
+@router.get("/admin/jobs", response_model=ScheduledJobsResponse)
+def get_background_jobs(db: Session = Depends(get_db)):
+    """
+    Admin endpoint: Background job status (see jobs.py): when each job last
+    ran, on which worker, its result and when it is due next.
+    """
+    
+    jobs = db.query(ScheduledJob).order_by(ScheduledJob.name).all()
+    return {"jobs": jobs}
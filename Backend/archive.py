@@ -0,0 +1,120 @@
+"""
+Archival of cold reviews, so "Review 1" (scanned by every dashboard query)
+only holds the hot working set.
+
+Reviews older than REVIEW_RETENTION_DAYS are moved one calendar month at a
+time to ARCHIVE_TARGET:
+- table: "Review 1_archive" (same columns, no search index)
+- parquet: one zstd Parquet file per month and run in ARCHIVE_DIR (use a
+  persistent disk)
+
+With the table target a month is copied and deleted in one transaction. With
+parquet, rows are deleted only once the file is complete. On a partitioned
+table (see partitioning.py), a month that lies entirely before the cutoff is
+dropped as a partition instead of deleted row by row.
+
+Runs daily as a background job (jobs.py) and does nothing while
+REVIEW_RETENTION_DAYS is 0. Archived reviews no longer appear in the
+dashboard, analytics, search or exports.
+
+    python archive.py --retention-days 365
+"""
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+import argparse
+import os
+
+from models import Review, ReviewArchive, REVIEW_DETAIL_COLUMNS
+from export import write_parquet_file
+from partitioning import add_months, is_partitioned, month_partitions, month_start
+
+load_dotenv()
+
+# 0 disables archival
+RETENTION_DAYS = int(os.getenv("REVIEW_RETENTION_DAYS", "0"))
+ARCHIVE_TARGET = os.getenv("ARCHIVE_TARGET", "table")
+ARCHIVE_TARGETS = ("table", "parquet")
+if ARCHIVE_TARGET not in ARCHIVE_TARGETS:
+    raise ValueError(f"ARCHIVE_TARGET must be one of {ARCHIVE_TARGETS}")
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "./archive")
+
+
+def _copy_to_table(db: Session, start: datetime, end: datetime):
+    rows = select(*REVIEW_DETAIL_COLUMNS).where(Review.created_at >= start, Review.created_at < end)
+    return db.execute(
+        insert(ReviewArchive).from_select([column.key for column in REVIEW_DETAIL_COLUMNS], rows)
+    ).rowcount
+
+
+def _copy_to_parquet(db: Session, start: datetime, end: datetime):
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    path = os.path.join(ARCHIVE_DIR, f"reviews_{start:%Y-%m}_{datetime.utcnow():%Y%m%dT%H%M%S}.parquet")
+    # Written under a temporary name so a crash never leaves a partial file
+    count = write_parquet_file(db, path + ".tmp", start, end)
+    if count:
+        os.replace(path + ".tmp", path)
+    else:
+        os.remove(path + ".tmp")
+    return count
+
+
+_COPIERS = {
+    "table": _copy_to_table,
+    "parquet": _copy_to_parquet,
+}
+
+
+def archive_reviews(db: Session, retention_days: int = RETENTION_DAYS):
+    """Move reviews older than `retention_days` to the archive. Returns a result summary."""
+    if retention_days <= 0:
+        return "archival disabled"
+
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    oldest = db.query(func.min(Review.created_at)).scalar()
+    if oldest is None or oldest >= cutoff:
+        return "nothing to archive"
+
+    partitions = month_partitions(db) if is_partitioned(db) else {}
+    copy = _COPIERS[ARCHIVE_TARGET]
+    archived = 0
+    dropped = []
+
+    month = month_start(oldest)
+    while month < cutoff:
+        next_month = add_months(month, 1)
+        end = min(next_month, cutoff)
+        archived += copy(db, month, end)
+        if end == next_month and month in partitions:
+            # Whole month is cold: dropping the partition is instant and leaves no bloat
+            db.execute(text(f'DROP TABLE "{partitions[month]}"'))
+            dropped.append(partitions[month])
+        else:
+            db.execute(delete(Review).where(Review.created_at >= month, Review.created_at < end))
+        db.commit()
+        month = next_month
+
+    result = f"archived {archived} reviews to {ARCHIVE_TARGET}"
+    if dropped:
+        result += f", dropped {', '.join(dropped)}"
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--retention-days", type=int, default=RETENTION_DAYS)
+    args = parser.parse_args()
+
+    from database import SessionLocal, engine
+
+    ReviewArchive.__table__.create(engine, checkfirst=True)
+    db = SessionLocal()
+    try:
+        print(archive_reviews(db, args.retention_days))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
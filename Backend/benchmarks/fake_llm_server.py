@@ -0,0 +1,172 @@
+"""
+Fake OpenAI-compatible chat completions server for offline benchmarks.
+
+Recognizes the prompts in Prediction.py and analytics.py by the JSON keys they
+ask for and returns a valid canned answer after a configurable delay. A
+configurable share of requests fails (HTTP 500/429) or returns malformed JSON,
+so error paths are exercised too. Supports `stream: true` (SSE chunks).
+
+Usage (from Backend/):
+    python benchmarks/fake_llm_server.py --port 9100 --latency-ms 800 --error-rate 0.02
+then set LLM_BASE_URL=http://127.0.0.1:9100/v1 for the app.
+"""
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+
+SETTINGS = {
+    "latency_ms": 800.0,
+    "jitter_ms": 200.0,
+    "error_rate": 0.0,
+    "malformed_rate": 0.0,
+    "token_delay_ms": 15.0,
+}
+
+CANNED = {
+    "review": {
+        "ai_summary": "Customer reported a mixed experience with slow service but good food.",
+        "ai_recommended_action": "Add staff during peak hours to reduce wait times.",
+        "ai_user_response": "Thank you for sharing your experience! We're sorry about the wait "
+                            "and are adding staff during busy hours so your next visit is quicker.",
+    },
+    "digest": {
+        "sentiment_score": 64,
+        "key_themes": ["Food quality praised", "Slow service concerns"],
+        "summary": "Customers liked the food but often mentioned long waits at peak times.",
+    },
+    "sentiment": {
+        "overall_sentiment": "Mixed",
+        "sentiment_score": 64,
+        "key_themes": ["Food quality praised", "Slow service concerns", "Friendly staff"],
+        "admin_insight": "Food quality is a strength. Peak-hour wait times need attention first.",
+    },
+    "priority": {
+        "priority_recommendations": [
+            {"action": "Add peak-hour staff", "priority": "High", "reason": "Most frequent complaint."},
+            {"action": "Review kitchen ticket times", "priority": "Medium", "reason": "Drives waits."},
+        ],
+        "quick_wins": ["Greet waiting guests with an ETA"],
+        "long_term_improvements": ["Redesign the kitchen workflow"],
+    },
+}
+
+app = FastAPI(title="Fake LLM server")
+
+
+def _pick_answer(messages):
+    system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+    if "priority_recommendations" in system:
+        return CANNED["priority"]
+    if "overall_sentiment" in system:
+        return CANNED["sentiment"]
+    if '"summary"' in system:
+        return CANNED["digest"]
+    # Keep keys in the order the prompt asks for (the streaming prompt puts
+    # ai_user_response first)
+    return dict(sorted(CANNED["review"].items(), key=lambda item: system.find(f'"{item[0]}"')))
+
+
+def _completion_id():
+    return f"chatcmpl-{uuid.uuid4().hex[:24]}"
+
+
+@app.get("/health")
+def health():
+    return {"status": "healthy", **SETTINGS}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    delay = max(0.0, random.gauss(SETTINGS["latency_ms"], SETTINGS["jitter_ms"])) / 1000
+
+    if random.random() < SETTINGS["error_rate"]:
+        await asyncio.sleep(delay / 4)
+        status = random.choice([429, 500])
+        return JSONResponse(
+            status_code=status,
+            content={"error": {"message": "Injected failure", "type": "server_error", "code": status}}
+        )
+
+    content = json.dumps(_pick_answer(body.get("messages", [])))
+    if random.random() < SETTINGS["malformed_rate"]:
+        # Truncated JSON, like a model that stopped early
+        content = content[: len(content) // 2]
+
+    model = body.get("model", "fake-model")
+
+    if body.get("stream"):
+        return StreamingResponse(_stream(content, model, delay), media_type="text/event-stream")
+
+    await asyncio.sleep(delay)
+    return {
+        "id": _completion_id(),
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 300, "completion_tokens": len(content) // 4, "total_tokens": 300 + len(content) // 4},
+    }
+
+
+async def _stream(content, model, delay):
+    completion_id = _completion_id()
+    created = int(time.time())
+
+    def chunk(delta, finish_reason=None):
+        return "data: " + json.dumps({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }) + "\n\n"
+
+    # Time to first token ~= a fraction of the full latency, then steady tokens
+    await asyncio.sleep(delay / 4)
+    yield chunk({"role": "assistant", "content": ""})
+    for i in range(0, len(content), 4):
+        yield chunk({"content": content[i:i + 4]})
+        await asyncio.sleep(SETTINGS["token_delay_ms"] / 1000)
+    yield chunk({}, "stop")
+    yield "data: [DONE]\n\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=SETTINGS["latency_ms"])
+    parser.add_argument("--jitter-ms", type=float, default=SETTINGS["jitter_ms"])
+    parser.add_argument("--error-rate", type=float, default=SETTINGS["error_rate"])
+    parser.add_argument("--malformed-rate", type=float, default=SETTINGS["malformed_rate"])
+    parser.add_argument("--token-delay-ms", type=float, default=SETTINGS["token_delay_ms"])
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    SETTINGS.update(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        token_delay_ms=args.token_delay_ms,
+    )
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Microbenchmark: /api/admin/reviews serialization cost and bytes on the wire.
+
+Compares, for N synthetic reviews (default 10k):
+- default path: ORM-like objects -> Pydantic AllReviewsResponse validation ->
+  JSON-mode dump -> stdlib json encoder (what FastAPI's response_model does)
+- fast path: plain row dicts -> orjson (what ?fast=true does)
+and the response size uncompressed, gzipped and brotli-compressed with the
+settings used by the middleware in main.py.
+
+Usage (from Backend/):
+    python benchmarks/serialization_bench.py --rows 10000 --repeat 5
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+import brotli
+import orjson
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from schemas import AllReviewsResponse  # noqa: E402
+
+WORDS = (
+    "food service staff wait table pizza friendly slow clean price great "
+    "terrible manager order delivery fresh cold warm recommend again never"
+).split()
+
+
+def _sentence(rng, min_words, max_words):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))).capitalize() + "."
+
+
+def make_rows(count, seed=42):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    rows = []
+    for i in range(count):
+        rows.append({
+            "id": uuid.UUID(int=rng.getrandbits(128)),
+            "rating": rng.randint(1, 5),
+            "review_text": _sentence(rng, 5, 60),
+            "ai_summary": _sentence(rng, 10, 20),
+            "ai_recommended_action": _sentence(rng, 8, 16),
+            "ai_response": _sentence(rng, 12, 30),
+            "created_at": start + timedelta(minutes=7 * i),
+        })
+    return rows
+
+
+def default_path(objects):
+    payload = AllReviewsResponse.model_validate(
+        {"reviews": objects, "total_count": len(objects)}, from_attributes=True
+    )
+    return json.dumps(
+        payload.model_dump(mode="json"), ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fast_path(rows):
+    return orjson.dumps({"reviews": rows, "total_count": len(rows)})
+
+
+def timed(func, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = func(arg)
+        best = min(best, time.perf_counter() - started)
+    return best, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    objects = [SimpleNamespace(**row) for row in rows]
+
+    default_time, default_body = timed(default_path, objects, args.repeat)
+    fast_time, fast_body = timed(fast_path, rows, args.repeat)
+
+    assert json.loads(default_body) == json.loads(fast_body), "paths must produce the same JSON"
+
+    gzip_started = time.perf_counter()
+    gzipped = gzip.compress(fast_body, compresslevel=5)
+    gzip_time = time.perf_counter() - gzip_started
+
+    brotli_started = time.perf_counter()
+    brotlied = brotli.compress(fast_body, mode=brotli.MODE_TEXT, quality=4)
+    brotli_time = time.perf_counter() - brotli_started
+
+    print(f"Reviews: {args.rows}  (best of {args.repeat})")
+    print()
+    print(f"{'serialization':<32}{'time (ms)':>12}{'speedup':>10}")
+    print(f"{'pydantic + json (default)':<32}{default_time * 1000:>12.1f}{1:>9.1f}x")
+    print(f"{'orjson from rows (fast=true)':<32}{fast_time * 1000:>12.1f}{default_time / fast_time:>9.1f}x")
+    print()
+    print(f"{'bytes on wire':<32}{'bytes':>12}{'ratio':>10}{'time (ms)':>12}")
+    print(f"{'uncompressed':<32}{len(fast_body):>12,}{1:>9.2f}x{0:>12.1f}")
+    print(f"{'gzip (level 5)':<32}{len(gzipped):>12,}{len(fast_body) / len(gzipped):>9.2f}x{gzip_time * 1000:>12.1f}")
+    print(f"{'brotli (quality 4)':<32}{len(brotlied):>12,}{len(fast_body) / len(brotlied):>9.2f}x{brotli_time * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""
+pytest setup for the Backend unit tests.
+
+Importing the app modules creates the SQLAlchemy engine and the LLM clients,
+so point them at a throwaway SQLite database and a dummy key. Nothing here
+talks to a database or the LLM.
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
+
+# Connection check script, not a test module
+collect_ignore = ["test_connection.py"]
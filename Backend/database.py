@@ -1,8 +1,9 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 from urllib.parse import quote_plus
+from contextlib import contextmanager
 import os
 
 # Load environment variables from .env
@@ -25,24 +26,38 @@ DATABASE_URL = f"postgresql+psycopg2://{USER}:{PASSWORD_ENCODED}@{HOST}:{PORT}/{
 if PORT == "6543":
     DATABASE_URL += "&prepare_threshold=0"
 
-# Create the SQLAlchemy engine with connection pooling optimized for Supabase
-# These settings help prevent timeout issues on Render
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=5,                    # Number of connections to maintain in the pool
-    max_overflow=10,                # Additional connections that can be created when pool is full
-    pool_timeout=30,                # Timeout for getting a connection from the pool
-    pool_recycle=3600,              # Recycle connections after 1 hour (3600 seconds)
-    pool_pre_ping=True,             # Test connections before using them (prevents stale connections)
-    connect_args={
-        "connect_timeout": 10,      # Connection timeout in seconds
-        "keepalives": 1,            # Enable TCP keepalive
-        "keepalives_idle": 30,      # Seconds before starting keepalive probes
-        "keepalives_interval": 10,  # Interval between keepalive probes
-        "keepalives_count": 5       # Number of keepalive probes before giving up
-    },
-    echo=False                      # Set to True for SQL query logging (debugging)
-)
+# Optional full URL override, e.g. DATABASE_URL=sqlite:///./reviews.db for local tests
+DATABASE_URL = os.getenv("DATABASE_URL") or DATABASE_URL
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+if IS_SQLITE:
+    # SQLite: no TCP settings; allow the session to be used from FastAPI's threadpool
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        echo=False
+    )
+else:
+    # Create the SQLAlchemy engine with connection pooling optimized for Supabase
+    # These settings help prevent timeout issues on Render
+    engine = create_engine(
+        DATABASE_URL,
+        # Per worker process: total connections = WEB_CONCURRENCY x (pool_size + max_overflow)
+        pool_size=int(os.getenv("DB_POOL_SIZE", "5")),        # Connections kept in the pool
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")), # Extra connections when the pool is full
+        pool_timeout=30,                # Timeout for getting a connection from the pool
+        pool_recycle=3600,              # Recycle connections after 1 hour (3600 seconds)
+        pool_pre_ping=True,             # Test connections before using them (prevents stale connections)
+        connect_args={
+            "connect_timeout": 10,      # Connection timeout in seconds
+            "keepalives": 1,            # Enable TCP keepalive
+            "keepalives_idle": 30,      # Seconds before starting keepalive probes
+            "keepalives_interval": 10,  # Interval between keepalive probes
+            "keepalives_count": 5       # Number of keepalive probes before giving up
+        },
+        echo=False                      # Set to True for SQL query logging (debugging)
+    )
 
 # Create a SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -57,3 +72,20 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Arbitrary constant identifying the schema lock
+SCHEMA_LOCK_KEY = 7301
+
+@contextmanager
+def schema_lock():
+    """
+    Serialize startup DDL across worker processes. Concurrent CREATE TABLE /
+    ALTER TABLE from several workers can fail on Postgres, so each worker takes
+    a transaction-level advisory lock first (safe with the transaction pooler).
+    """
+    if IS_SQLITE:
+        yield
+        return
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        yield
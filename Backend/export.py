@@ -0,0 +1,151 @@
+"""
+Streaming export of reviews as CSV, JSONL or Parquet.
+
+Rows are read through a server-side cursor (yield_per) in batches of
+EXPORT_BATCH_SIZE and each batch is encoded and handed to the response
+immediately, so memory stays bounded by one batch regardless of table size.
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
+from dotenv import load_dotenv
+import csv
+import io
+import os
+
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from models import Review, REVIEW_DETAIL_COLUMNS
+
+load_dotenv()
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+_COLUMN_NAMES = [column.key for column in REVIEW_DETAIL_COLUMNS]
+
+_PARQUET_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("rating", pa.int32()),
+    ("review_text", pa.string()),
+    ("ai_summary", pa.string()),
+    ("ai_recommended_action", pa.string()),
+    ("ai_response", pa.string()),
+    ("created_at", pa.timestamp("us")),
+])
+
+
+def iter_review_batches(db: Session, start_date: Optional[datetime] = None,
+                        end_date: Optional[datetime] = None, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yield lists of row tuples (oldest first) using a server-side cursor."""
+    query = select(*REVIEW_DETAIL_COLUMNS).order_by(Review.created_at.asc())
+    if start_date:
+        query = query.where(Review.created_at >= start_date)
+    if end_date:
+        query = query.where(Review.created_at < end_date)
+
+    result = db.execute(query.execution_options(yield_per=batch_size))
+    for batch in result.partitions():
+        yield batch
+
+
+def _csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(_COLUMN_NAMES)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _jsonl_chunks(batches):
+    for batch in batches:
+        yield b"".join(
+            orjson.dumps(dict(zip(_COLUMN_NAMES, row)), option=orjson.OPT_APPEND_NEWLINE)
+            for row in batch
+        )
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to the caller.
+
+    Parquet footers store absolute row-group offsets, so tell() must report the
+    total bytes written even though the buffer is drained after every batch.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _parquet_chunks(batches):
+    sink = _ChunkSink()
+    # One row group per batch keeps the writer's buffered state to a single batch
+    with pq.ParquetWriter(sink, _PARQUET_SCHEMA, compression="zstd") as writer:
+        for batch in batches:
+            columns = list(zip(*batch))
+            columns[0] = [str(review_id) for review_id in columns[0]]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, _PARQUET_SCHEMA)],
+                schema=_PARQUET_SCHEMA
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+
+_ENCODERS = {
+    "csv": _csv_chunks,
+    "jsonl": _jsonl_chunks,
+    "parquet": _parquet_chunks,
+}
+
+
+def export_reviews(db: Session, export_format: str, start_date: Optional[datetime] = None,
+                   end_date: Optional[datetime] = None):
+    """Generator of encoded byte chunks for StreamingResponse."""
+    return _ENCODERS[export_format](iter_review_batches(db, start_date, end_date))
+
+
+def write_parquet_file(db: Session, path: str, start_date: Optional[datetime] = None,
+                       end_date: Optional[datetime] = None):
+    """Write reviews in [start_date, end_date) to a Parquet file. Returns the row count."""
+    row_count = 0
+
+    def counted(batches):
+        nonlocal row_count
+        for batch in batches:
+            row_count += len(batch)
+            yield batch
+
+    with open(path, "wb") as f:
+        for chunk in _parquet_chunks(counted(iter_review_batches(db, start_date, end_date))):
+            f.write(chunk)
+    return row_count
@@ -0,0 +1,239 @@
+"""
+Periodic background LLM work, coordinated across uvicorn worker processes.
+
+Every worker runs a JobScheduler thread, but a job only runs in the worker that
+claims its row in `scheduled_jobs` (SELECT ... FOR UPDATE SKIP LOCKED). The row
+lock is held until the job finishes and next_run_at has moved forward, so
+exactly one worker runs each job per interval, no broker needed. If a worker
+dies mid-job its transaction rolls back and another worker picks the job up.
+
+Jobs:
+- enrich_pending: fill in summary and recommended action for reviews stored
+  without them (admission degraded mode). The reviews themselves are also
+  claimed with SKIP LOCKED, so overlapping drains never enrich a review twice.
+  LLM calls only take free enrichment_limiter slots, so live submissions keep
+  priority, and failed reviews are retried with backoff (enrichment_attempts)
+  before they get the fallback output.
+- refresh_sentiment: keep the sentiment chunk-digest cache warm, so
+  /analytics/sentiment?mode=all only pays for the open tail chunk, the merges
+  above it and the reduce. Only closed nodes are summarized, so an idle
+  system makes no LLM calls.
+- maintain_partitions: create upcoming monthly partitions (partitioning.py).
+- archive_reviews: move reviews past the retention window out (archive.py).
+
+SQLite ignores FOR UPDATE, so run a single worker there (serve.py does).
+"""
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from langchain_core.runnables import RunnableLambda
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+import logging
+import os
+import random
+import socket
+import threading
+
+from database import SessionLocal
+from models import EnrichmentAttempt, Review, ScheduledJob
+from Prediction import chain, FALLBACK_OUTPUT
+from admission import enrichment_limiter
+from sentiment_rollup import summarize_chunks
+from partitioning import ensure_future_partitions
+from archive import archive_reviews
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Set to false to run no background jobs in this process
+BACKGROUND_JOBS = os.getenv("BACKGROUND_JOBS", "true").lower() == "true"
+# How often each worker checks for due jobs
+POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "10"))
+ENRICH_INTERVAL = int(os.getenv("JOB_ENRICH_INTERVAL", "60"))
+# Reviews enriched per run, and parallel LLM calls while doing so
+ENRICH_BATCH_SIZE = int(os.getenv("JOB_ENRICH_BATCH_SIZE", "20"))
+ENRICH_CONCURRENCY = int(os.getenv("JOB_ENRICH_CONCURRENCY", "2"))
+# Failures before a review gets the fallback output; retries back off exponentially
+ENRICH_MAX_ATTEMPTS = int(os.getenv("JOB_ENRICH_MAX_ATTEMPTS", "5"))
+SENTIMENT_REFRESH_INTERVAL = int(os.getenv("JOB_SENTIMENT_REFRESH_INTERVAL", "900"))
+PARTITION_INTERVAL = int(os.getenv("JOB_PARTITION_INTERVAL", "86400"))
+ARCHIVE_INTERVAL = int(os.getenv("JOB_ARCHIVE_INTERVAL", "86400"))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ===== JOBS =====
+
+def _enrich(inputs: dict):
+    """One enrichment through the shared limiter. None if no slot was free."""
+    # Live submissions come first: never queue behind or ahead of them
+    if not enrichment_limiter.try_acquire():
+        return None
+    try:
+        return chain.invoke(inputs)
+    finally:
+        enrichment_limiter.release()
+
+
+def enrich_pending_reviews(db: Session):
+    """Enrich up to ENRICH_BATCH_SIZE reviews that have no AI summary yet, oldest first."""
+    now = datetime.utcnow()
+    rows = (
+        db.query(Review, EnrichmentAttempt)
+        .outerjoin(EnrichmentAttempt, EnrichmentAttempt.review_id == Review.id)
+        .filter(Review.ai_summary.is_(None))
+        .filter(or_(EnrichmentAttempt.next_attempt_at.is_(None), EnrichmentAttempt.next_attempt_at <= now))
+        .order_by(Review.created_at.asc())
+        .limit(ENRICH_BATCH_SIZE)
+        .with_for_update(skip_locked=True, of=Review)
+        .all()
+    )
+    if not rows:
+        return "no pending reviews"
+
+    outputs = RunnableLambda(_enrich).batch(
+        [{"rating": review.rating, "review": review.review_text} for review, _ in rows],
+        config={"max_concurrency": ENRICH_CONCURRENCY},
+        return_exceptions=True
+    )
+
+    enriched = retrying = failed = busy = 0
+    for (review, attempt), output in zip(rows, outputs):
+        if output is None:
+            # LLM busy with live traffic; not the review's fault, try next run
+            busy += 1
+            continue
+
+        if isinstance(output, Exception):
+            attempts = (attempt.attempts if attempt else 0) + 1
+            if attempts < ENRICH_MAX_ATTEMPTS:
+                # Errors are mostly transient (429/5xx), so back off and retry
+                if attempt is None:
+                    attempt = EnrichmentAttempt(review_id=review.id)
+                    db.add(attempt)
+                attempt.attempts = attempts
+                attempt.next_attempt_at = now + timedelta(seconds=ENRICH_INTERVAL * 2 ** (attempts - 1))
+                attempt.last_error = f"{type(output).__name__}: {output}"[:1000]
+                retrying += 1
+                continue
+            # A review that keeps failing must not stay in the queue, so it gets
+            # the same fallback as a failed request. The user already got their
+            # reply, so ai_response is left as is.
+            failed += 1
+            output = FALLBACK_OUTPUT
+        else:
+            enriched += 1
+
+        review.ai_summary = output["ai_summary"]
+        review.ai_recommended_action = output["ai_recommended_action"]
+        if attempt is not None:
+            db.delete(attempt)
+
+    db.commit()
+    return f"enriched {enriched} reviews, {retrying} to retry, {failed} failed, {busy} skipped (LLM busy)"
+
+
+def refresh_sentiment_cache(db: Session):
+    """Summarize any newly closed chunks of the full history."""
+    nodes, total_reviews = summarize_chunks(db, closed_only=True)
+    if not nodes:
+        return "no reviews"
+    # The open tail changes with every review; requests summarize it on demand
+    return f"{sum(node['closed'] for node in nodes)}/{len(nodes)} top-level digests cached, {total_reviews} reviews"
+
+
+# name -> (interval in seconds, function(db) returning a short result summary)
+JOBS = {
+    "enrich_pending": (ENRICH_INTERVAL, enrich_pending_reviews),
+    "refresh_sentiment": (SENTIMENT_REFRESH_INTERVAL, refresh_sentiment_cache),
+    "maintain_partitions": (PARTITION_INTERVAL, ensure_future_partitions),
+    "archive_reviews": (ARCHIVE_INTERVAL, archive_reviews),
+}
+
+
+# ===== SCHEDULER =====
+
+def _register_jobs(jobs):
+    """Insert a row for every job that doesn't have one yet (due immediately)."""
+    db = SessionLocal()
+    try:
+        existing = {name for (name,) in db.query(ScheduledJob.name).all()}
+        for name in jobs:
+            if name in existing:
+                continue
+            db.add(ScheduledJob(name=name, next_run_at=datetime.utcnow()))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another worker registered it first
+                db.rollback()
+    finally:
+        db.close()
+
+
+def run_if_due(name: str, interval: int, fn):
+    """Run one job if it is due and no other worker holds it. Returns True if it ran."""
+    now = datetime.utcnow()
+    claim = SessionLocal()
+    try:
+        job = (
+            claim.query(ScheduledJob)
+            .filter(ScheduledJob.name == name, ScheduledJob.next_run_at <= now)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            return False
+
+        job.last_started_at = now
+        job.last_run_by = WORKER_ID
+
+        # The job gets its own session; `claim` keeps the row locked meanwhile
+        db = SessionLocal()
+        try:
+            job.last_result = fn(db)
+        except Exception as e:
+            db.rollback()
+            logger.exception("Background job %s failed", name)
+            job.last_result = f"error: {e}"[:1000]
+        finally:
+            db.close()
+
+        job.next_run_at = now + timedelta(seconds=interval)
+        job.last_finished_at = datetime.utcnow()
+        claim.commit()
+        return True
+    finally:
+        claim.close()
+
+
+class JobScheduler:
+    """Daemon thread that runs due jobs one at a time."""
+
+    def __init__(self, jobs=JOBS, poll_interval: float = POLL_INTERVAL):
+        self.jobs = jobs
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="job-scheduler", daemon=True)
+
+    def start(self):
+        _register_jobs(self.jobs)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=30)
+
+    def _loop(self):
+        # Jitter so workers started together don't all poll at the same instant
+        while not self._stop.wait(self.poll_interval * random.uniform(0.5, 1.5)):
+            for name, (interval, fn) in self.jobs.items():
+                if self._stop.is_set():
+                    return
+                try:
+                    run_if_due(name, interval, fn)
+                except Exception:
+                    # Database unreachable etc.; try again next poll
+                    logger.exception("Could not run background job %s", name)
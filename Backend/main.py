@@ -1,14 +1,39 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from brotli_asgi import BrotliMiddleware
+from contextlib import asynccontextmanager
 from api import router
-from database import engine, Base
+from database import engine, Base, schema_lock, IS_SQLITE
+from search import ensure_search_index
+from partitioning import ensure_review_indexes, missing_review_indexes
+from admission import enrichment_limiter
+from jobs import JobScheduler, BACKGROUND_JOBS
+from dotenv import load_dotenv
+import logging
 import uvicorn
+import os
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Every worker runs a scheduler; jobs.py makes sure only one runs each job
+    scheduler = JobScheduler() if BACKGROUND_JOBS else None
+    if scheduler:
+        scheduler.start()
+    yield
+    if scheduler:
+        scheduler.stop()
 
 # Create FastAPI app
 app = FastAPI(
     title="Review Analysis API",
     description="API for submitting and analyzing customer reviews using AI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -18,10 +43,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Compress responses above the threshold: brotli when the client accepts it,
+# gzip otherwise (GZip skips responses brotli already encoded). Keeps the
+# polled /api/admin/reviews payload small on the wire. gzip level 5 is ~5x
+# cheaper than the default 9 for a few percent more bytes.
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+app.add_middleware(
+    BrotliMiddleware,
+    minimum_size=COMPRESSION_MIN_SIZE,
+    quality=4,
+    gzip_fallback=False,
+    excluded_handlers=[r"^/api/reviews/stream$"]  # SSE must not be buffered
+)
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE, compresslevel=5)
+
+# Create database tables (one worker at a time)
+with schema_lock():
+    Base.metadata.create_all(bind=engine)
+    if IS_SQLITE:
+        ensure_review_indexes(engine)
+        ensure_search_index(engine)
+
+# On Postgres, indexes and the search column are built from the command line
+# instead, so startup never blocks writes on a large table
+missing_indexes = missing_review_indexes(engine)
+if missing_indexes:
+    logger.warning(
+        "Missing indexes %s on \"Review 1\"; run `python partitioning.py indexes`",
+        ", ".join(missing_indexes)
+    )
 
 # Include API router
 app.include_router(router)
@@ -38,7 +91,8 @@ def read_root():
 # Health check endpoint
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
+    return {"status": "healthy", "admission": enrichment_limiter.stats()}
 
+# Development server; use serve.py for production (multiple workers)
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=4000, reload=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Text
+from sqlalchemy import Column, String, Integer, Float, DateTime, Text
 from sqlalchemy.dialects.postgresql import UUID
 from database import Base
 import uuid
@@ -7,9 +7,78 @@ class Review(Base):
     __tablename__ = "Review 1"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    rating = Column(Integer, nullable=False, index=True)
+    review_text = Column(Text, nullable=True)
+    ai_summary = Column(Text, nullable=True)
+    ai_recommended_action = Column(Text, nullable=True)
+    ai_response = Column(Text, nullable=True)
+    # Every dashboard query filters or orders by created_at. On Postgres the
+    # table can also be range-partitioned by month on it (see partitioning.py).
+    created_at = Column(DateTime, nullable=False, index=True)
+
+class ReviewArchive(Base):
+    """Reviews moved out of "Review 1" after REVIEW_RETENTION_DAYS (see archive.py)."""
+    __tablename__ = "Review 1_archive"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
     rating = Column(Integer, nullable=False)
     review_text = Column(Text, nullable=True)
     ai_summary = Column(Text, nullable=True)
     ai_recommended_action = Column(Text, nullable=True)
     ai_response = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, index=True)
+
+# Columns exposed as ReviewDetail, for queries that skip building ORM objects
+REVIEW_DETAIL_COLUMNS = (
+    Review.id,
+    Review.rating,
+    Review.review_text,
+    Review.ai_summary,
+    Review.ai_recommended_action,
+    Review.ai_response,
+    Review.created_at,
+)
+
+class SentimentChunkSummary(Base):
+    """Permanent cache of LLM digests for closed chunks of reviews.
+
+    chunk_key is a hash of the review ids (or child chunk keys) a digest covers,
+    so a cached digest is reused for as long as that exact set of reviews exists.
+    """
+    __tablename__ = "sentiment_chunk_summaries"
+
+    chunk_key = Column(String(64), primary_key=True)
+    review_count = Column(Integer, nullable=False)
+    average_rating = Column(Float, nullable=False)
+    period_start = Column(DateTime, nullable=False)
+    period_end = Column(DateTime, nullable=False)
+    digest = Column(Text, nullable=False)  # JSON from chunk_summary_chain
     created_at = Column(DateTime, nullable=False)
+
+class ScheduledJob(Base):
+    """One row per background job (see jobs.py).
+
+    Workers claim a due job by locking its row, so exactly one worker runs it
+    per interval.
+    """
+    __tablename__ = "scheduled_jobs"
+
+    name = Column(String(64), primary_key=True)
+    next_run_at = Column(DateTime, nullable=False)
+    last_started_at = Column(DateTime, nullable=True)
+    last_finished_at = Column(DateTime, nullable=True)
+    last_run_by = Column(String(255), nullable=True)  # host:pid of the worker
+    last_result = Column(Text, nullable=True)  # result summary or error
+
+class EnrichmentAttempt(Base):
+    """Failed enrich_pending attempts for a review still missing its AI fields (see jobs.py).
+
+    The review is retried after next_attempt_at, and only gets the fallback
+    output once it has failed ENRICH_MAX_ATTEMPTS times.
+    """
+    __tablename__ = "enrichment_attempts"
+
+    review_id = Column(UUID(as_uuid=True), primary_key=True)
+    attempts = Column(Integer, nullable=False)
+    next_attempt_at = Column(DateTime, nullable=False)
+    last_error = Column(Text, nullable=True)
@@ -0,0 +1,255 @@
+"""
+Indexes and monthly range partitioning of "Review 1" on created_at (Postgres).
+
+- ensure_review_indexes() adds the created_at / rating indexes declared on the
+  Review model to tables created before they existed (create_all skips
+  existing tables). On Postgres it uses CREATE INDEX CONCURRENTLY, so writes
+  continue during the build. That can't run in a transaction or under the
+  startup schema lock, so there it runs from the command line, not at startup.
+  A partitioned table can't be indexed concurrently as a whole, so there each
+  partition is indexed concurrently and attached to a parent index.
+- migrate_to_partitioned() converts the table in one transaction: it creates
+  a partitioned copy with one partition per month plus a DEFAULT partition,
+  copies the rows, builds the indexes and search column, then swaps the
+  tables. Postgres requires the partition key in the primary key, so it
+  becomes (id, created_at).
+- ensure_future_partitions() creates partitions up to PARTITION_MONTHS_AHEAD
+  months ahead. It runs daily as a background job (jobs.py), so new rows never
+  land in the DEFAULT partition.
+
+Unpartitioned tables and SQLite are left alone, so everything here is opt-in
+through the migrate command:
+
+    python partitioning.py indexes    # after upgrading an existing deployment (incl. search)
+    python partitioning.py migrate    # one-off, during a quiet period
+    python partitioning.py status
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from datetime import datetime
+from dotenv import load_dotenv
+import argparse
+import os
+import re
+
+from models import Review
+from search import ensure_search_index, PG_SEARCH_COLUMN, PG_SEARCH_INDEX
+
+load_dotenv()
+
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+TABLE = Review.__tablename__
+DEFAULT_PARTITION = f"{TABLE}_default"
+_PARTITION_NAME = re.compile(rf"^{re.escape(TABLE)}_p(\d{{4}})_(\d{{2}})$")
+
+# Plain columns, in model order; search_vector is generated
+_COLUMNS = ", ".join(column.name for column in Review.__table__.columns)
+
+
+def month_start(moment: datetime):
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(month: datetime, months: int):
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime):
+    return f"{TABLE}_p{month.year:04d}_{month.month:02d}"
+
+
+def _index_validity(conn, name: str):
+    """True if the index exists and is usable, False if a failed build left it invalid, else None."""
+    return conn.execute(text(
+        "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"
+    ), {"name": f'"{name}"'}).scalar()
+
+
+def missing_review_indexes(engine):
+    """Names of the Review indexes (model and search) missing or invalid on Postgres."""
+    if engine.dialect.name != "postgresql":
+        return []
+    names = [index.name for index in Review.__table__.indexes] + [PG_SEARCH_INDEX]
+    with engine.connect() as conn:
+        return [name for name in names if not _index_validity(conn, name)]
+
+
+def _create_index_concurrently(conn, name: str, table: str, definition: str):
+    valid = _index_validity(conn, name)
+    if valid:
+        return
+    if valid is False:
+        # Left behind by an interrupted concurrent build
+        conn.execute(text(f'DROP INDEX CONCURRENTLY "{name}"'))
+    conn.execute(text(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" {definition}'))
+
+
+def ensure_index(engine, name: str, columns, method: str = "btree"):
+    """Create an index on "Review 1" without blocking writes, if missing. Postgres only."""
+    quoted = ", ".join(f'"{column}"' for column in columns)
+    definition = f"USING {method} ({quoted})"
+    # CONCURRENTLY only takes a lock that lets writes through, but must run
+    # outside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if not _is_partitioned(conn):
+            _create_index_concurrently(conn, name, TABLE, definition)
+            return
+
+        # The parent index is created empty (ON ONLY) and stays invalid until
+        # every partition's index is attached. Child names follow Postgres'
+        # own, so indexes it created for newer partitions match.
+        conn.execute(text(f'CREATE INDEX IF NOT EXISTS "{name}" ON ONLY "{TABLE}" {definition}'))
+        for partition in _partition_names(conn):
+            child = f"{partition}_{'_'.join(columns)}_idx"
+            _create_index_concurrently(conn, child, partition, definition)
+            conn.execute(text(f'ALTER INDEX "{name}" ATTACH PARTITION "{child}"'))
+
+
+def ensure_review_indexes(engine):
+    """Create the Review model's indexes if missing. Idempotent, any dialect."""
+    if engine.dialect.name != "postgresql":
+        with engine.begin() as conn:
+            for index in Review.__table__.indexes:
+                index.create(conn, checkfirst=True)
+        return
+
+    for index in Review.__table__.indexes:
+        ensure_index(engine, index.name, [column.name for column in index.columns])
+
+
+def _is_partitioned(conn):
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"
+    ), {"table": f'"{TABLE}"'}).first() is not None
+
+
+def _partition_names(conn):
+    """Every partition of "Review 1", including DEFAULT."""
+    return conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table)"
+    ), {"table": f'"{TABLE}"'}).scalars().all()
+
+
+def is_partitioned(db: Session):
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return _is_partitioned(db)
+
+
+def month_partitions(db: Session):
+    """{month start: partition name} for the monthly partitions of "Review 1"."""
+    partitions = {}
+    for name in _partition_names(db):
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions[datetime(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def _create_partition(db: Session, parent: str, month: datetime):
+    db.execute(text(
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(month)}" PARTITION OF "{parent}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    ))
+
+
+def ensure_future_partitions(db: Session, months_ahead: int = PARTITION_MONTHS_AHEAD):
+    """Create this month's partition and the next `months_ahead`. No-op if unpartitioned."""
+    if not is_partitioned(db):
+        return "table is not partitioned"
+
+    existing = month_partitions(db)
+    current = month_start(datetime.utcnow())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            _create_partition(db, TABLE, month)
+            created.append(partition_name(month))
+    db.commit()
+    return f"created {', '.join(created)}" if created else "partitions up to date"
+
+
+def migrate_to_partitioned(db: Session, months_ahead: int = PARTITION_MONTHS_AHEAD):
+    """Convert "Review 1" into a table partitioned by month. Postgres only."""
+    if db.get_bind().dialect.name != "postgresql":
+        raise RuntimeError("Partitioning requires PostgreSQL")
+    if is_partitioned(db):
+        return "already partitioned"
+
+    staging = f"{TABLE}_partitioned"
+    # Block writes for the duration of the copy; the swap commits atomically
+    db.execute(text(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE'))
+    db.execute(text(f'''
+        CREATE TABLE "{staging}" (
+            id UUID NOT NULL,
+            rating INTEGER NOT NULL,
+            review_text TEXT,
+            ai_summary TEXT,
+            ai_recommended_action TEXT,
+            ai_response TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            {PG_SEARCH_COLUMN},
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    '''))
+
+    oldest = db.execute(text(f'SELECT min(created_at) FROM "{TABLE}"')).scalar()
+    month = month_start(oldest or datetime.utcnow())
+    last = add_months(month_start(datetime.utcnow()), months_ahead)
+    while month <= last:
+        _create_partition(db, staging, month)
+        month = add_months(month, 1)
+    # Catches rows outside every monthly range instead of failing the insert
+    db.execute(text(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{staging}" DEFAULT'))
+
+    copied = db.execute(text(
+        f'INSERT INTO "{staging}" ({_COLUMNS}) SELECT {_COLUMNS} FROM "{TABLE}"'
+    )).rowcount
+    db.execute(text(f'DROP TABLE "{TABLE}"'))
+
+    # Indexed here, still under the lock: a partitioned table can't be indexed
+    # concurrently later. Dropping the old table freed the index names.
+    for index in Review.__table__.indexes:
+        columns = ", ".join(f'"{column.name}"' for column in index.columns)
+        db.execute(text(f'CREATE INDEX "{index.name}" ON "{staging}" ({columns})'))
+    db.execute(text(f'CREATE INDEX {PG_SEARCH_INDEX} ON "{staging}" USING GIN (search_vector)'))
+
+    db.execute(text(f'ALTER TABLE "{staging}" RENAME TO "{TABLE}"'))
+    db.commit()
+    return f"moved {copied} reviews into {len(month_partitions(db))} monthly partitions"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["indexes", "migrate", "maintain", "status"])
+    parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    args = parser.parse_args()
+
+    from database import SessionLocal, engine
+
+    db = SessionLocal()
+    try:
+        if args.command == "indexes":
+            ensure_review_indexes(engine)
+            ensure_search_index(engine)
+            print("indexes up to date")
+        elif args.command == "migrate":
+            print(migrate_to_partitioned(db, args.months_ahead))
+        elif args.command == "maintain":
+            print(ensure_future_partitions(db, args.months_ahead))
+        elif is_partitioned(db):
+            for month, name in sorted(month_partitions(db).items()):
+                count = db.execute(text(f'SELECT count(*) FROM "{name}"')).scalar()
+                print(f"{name}: {count} reviews")
+        else:
+            print("table is not partitioned")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
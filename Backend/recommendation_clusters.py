@@ -0,0 +1,98 @@
+"""
+Local pre-grouping of AI recommendations before priority_chain.
+
+Thousands of ai_recommended_action strings are collapsed into a fixed number of
+weighted clusters (TF-IDF vectors + k-means), so the LLM only sees one
+representative per cluster together with its frequency and average rating.
+"""
+from collections import defaultdict
+from dotenv import load_dotenv
+import numpy as np
+import os
+
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+load_dotenv()
+
+# Max clusters (= lines) sent to the LLM, independent of history size
+MAX_CLUSTERS = int(os.getenv("RECOMMENDATION_MAX_CLUSTERS", "30"))
+
+
+def _normalize(text):
+    return " ".join(text.lower().split())
+
+
+def cluster_recommendations(rows, max_clusters: int = MAX_CLUSTERS):
+    """
+    Group (ai_recommended_action, rating) rows into at most max_clusters clusters.
+
+    Returns a list of dicts sorted by frequency (most common first):
+        {"representative": str, "count": int, "average_rating": float}
+    """
+    # Exact duplicates are common ("Maintain current quality."), so dedupe
+    # first and carry the frequency as a sample weight.
+    texts = {}
+    counts = defaultdict(int)
+    rating_sums = defaultdict(float)
+    for action, rating in rows:
+        if not action or not action.strip():
+            continue
+        key = _normalize(action)
+        texts.setdefault(key, action.strip())
+        counts[key] += 1
+        rating_sums[key] += rating
+
+    keys = list(texts)
+    if not keys:
+        return []
+
+    vectors = None
+    if len(keys) > max_clusters:
+        try:
+            vectors = TfidfVectorizer(
+                ngram_range=(1, 2),
+                min_df=1,
+                sublinear_tf=True
+            ).fit_transform(keys)
+        except ValueError:
+            # Empty vocabulary (no token of 2+ characters in any action):
+            # nothing to cluster on, keep the most frequent actions as-is
+            keys = sorted(keys, key=lambda key: counts[key], reverse=True)[:max_clusters]
+
+    if vectors is None:
+        labels = np.arange(len(keys))
+    else:
+        kmeans = MiniBatchKMeans(
+            n_clusters=max_clusters,
+            random_state=42,
+            n_init=3,
+            batch_size=1024
+        )
+        weights = np.array([counts[key] for key in keys], dtype=float)
+        labels = kmeans.fit_predict(vectors, sample_weight=weights)
+
+    members = defaultdict(list)
+    for index, label in enumerate(labels):
+        members[label].append(index)
+
+    clusters = []
+    for label, indexes in members.items():
+        if vectors is None or len(indexes) == 1:
+            representative = indexes[0]
+        else:
+            # Member closest to the centroid (TF-IDF rows are L2-normalized,
+            # so the highest dot product is the closest)
+            centroid = kmeans.cluster_centers_[label]
+            similarity = vectors[indexes] @ centroid
+            representative = indexes[int(np.argmax(similarity))]
+
+        count = sum(counts[keys[i]] for i in indexes)
+        clusters.append({
+            "representative": texts[keys[representative]],
+            "count": count,
+            "average_rating": sum(rating_sums[keys[i]] for i in indexes) / count
+        })
+
+    clusters.sort(key=lambda cluster: cluster["count"], reverse=True)
+    return clusters
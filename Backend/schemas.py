@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from uuid import UUID
 
@@ -11,28 +11,45 @@ class ReviewCreateResponse(BaseModel):
     success: bool
     message: str
 
-class SentimentAnalysisResponse(BaseModel):
+# ===== LLM OUTPUT SCHEMAS (used by structured.py) =====
+class ReviewAnalysis(BaseModel):
+    ai_summary: str
+    ai_recommended_action: str
+    ai_user_response: str
+
+class SentimentDigest(BaseModel):
+    sentiment_score: int
+    key_themes: List[str]
+    summary: str
+
+class SentimentAnalysis(BaseModel):
     overall_sentiment: str
     sentiment_score: int
     key_themes: List[str]
     admin_insight: str
-    total_reviews_analyzed: int
 
 class PriorityRecommendation(BaseModel):
     action: str
     priority: str
     reason: str
 
-class RecommendationPriorityResponse(BaseModel):
+class RecommendationPriority(BaseModel):
     priority_recommendations: List[PriorityRecommendation]
     quick_wins: List[str]
     long_term_improvements: List[str]
+
+# ===== API SCHEMAS =====
+class SentimentAnalysisResponse(SentimentAnalysis):
+    total_reviews_analyzed: int
+
+class RecommendationPriorityResponse(RecommendationPriority):
     total_recommendations_analyzed: int
 
 class RatingsDataResponse(BaseModel):
     ratings: List[int]
     total_reviews: int
     average_rating: float
+    rating_counts: Dict[int, int]  # rating -> number of reviews
 
 class ReviewDetail(BaseModel):
     id: UUID
@@ -48,4 +65,32 @@ class ReviewDetail(BaseModel):
 
 class AllReviewsResponse(BaseModel):
     reviews: List[ReviewDetail]
-    total_count: int
\ No newline at end of file
+    total_count: int
+
+class ReviewSearchHit(ReviewDetail):
+    relevance: float
+
+class ReviewSearchResponse(BaseModel):
+    results: List[ReviewSearchHit]
+    total_count: int
+    total_count_capped: bool = False  # more than total_count matches exist
+    page: int
+    page_size: int
+
+class LLMParseStatsResponse(BaseModel):
+    mode: str
+    chains: Dict[str, Dict[str, int]]
+
+class ScheduledJobStatus(BaseModel):
+    name: str
+    next_run_at: datetime
+    last_started_at: Optional[datetime]
+    last_finished_at: Optional[datetime]
+    last_run_by: Optional[str]
+    last_result: Optional[str]
+
+    class Config:
+        from_attributes = True
+
+class ScheduledJobsResponse(BaseModel):
+    jobs: List[ScheduledJobStatus]
@@ -0,0 +1,202 @@
+"""
+Indexed full-text search over review_text, ai_summary and ai_recommended_action.
+
+- PostgreSQL: a stored generated tsvector column on "Review 1" with a GIN index,
+  queried with websearch_to_tsquery and ranked with ts_rank_cd.
+- SQLite (local tests): an external-content FTS5 table kept in sync by
+  triggers, ranked with bm25. The web-search syntax ("phrases", OR, -term)
+  is translated to FTS5; a group of only excluded terms (a OR -b) can't be
+  expressed there and is dropped.
+
+total_count is exact up to SEARCH_COUNT_LIMIT matches (or the requested page,
+if deeper). Beyond that counting would cost as much as the search itself, so
+the count stops and the result reports it as capped.
+
+The search column is managed here with DDL rather than on the Review model, so
+ORM queries never load it and create_all stays portable.
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
+from dotenv import load_dotenv
+import os
+import re
+
+load_dotenv()
+
+SEARCH_CONFIG = "english"
+# Matches counted at most for total_count
+SEARCH_COUNT_LIMIT = int(os.getenv("SEARCH_COUNT_LIMIT", "1000"))
+
+# Column weights: the customer's own words rank above AI-generated text
+_PG_SEARCH_VECTOR = f"""
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(review_text, '')), 'A') ||
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(ai_summary, '')), 'B') ||
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(ai_recommended_action, '')), 'C')
+"""
+
+# Column definition and index name, also used by partitioning.py
+PG_SEARCH_COLUMN = f"search_vector tsvector GENERATED ALWAYS AS ({_PG_SEARCH_VECTOR}) STORED"
+PG_SEARCH_INDEX = "ix_review_search_vector"
+
+_SQLITE_DDL = [
+    '''CREATE TRIGGER IF NOT EXISTS review_fts_ai AFTER INSERT ON "Review 1" BEGIN
+        INSERT INTO review_fts(rowid, review_text, ai_summary, ai_recommended_action)
+        VALUES (new.rowid, new.review_text, new.ai_summary, new.ai_recommended_action);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS review_fts_ad AFTER DELETE ON "Review 1" BEGIN
+        INSERT INTO review_fts(review_fts, rowid, review_text, ai_summary, ai_recommended_action)
+        VALUES ('delete', old.rowid, old.review_text, old.ai_summary, old.ai_recommended_action);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS review_fts_au AFTER UPDATE ON "Review 1" BEGIN
+        INSERT INTO review_fts(review_fts, rowid, review_text, ai_summary, ai_recommended_action)
+        VALUES ('delete', old.rowid, old.review_text, old.ai_summary, old.ai_recommended_action);
+        INSERT INTO review_fts(rowid, review_text, ai_summary, ai_recommended_action)
+        VALUES (new.rowid, new.review_text, new.ai_summary, new.ai_recommended_action);
+    END''',
+]
+
+_REVIEW_COLUMNS = "r.id, r.rating, r.review_text, r.ai_summary, r.ai_recommended_action, r.ai_response, r.created_at"
+
+
+def ensure_search_index(engine):
+    """
+    Create the search column/index (or FTS5 table) if missing. Idempotent.
+
+    SQLite runs this at startup. On Postgres adding the generated column is a
+    one-time table rewrite under an exclusive lock, so it runs from the
+    command line during a quiet period (`python partitioning.py indexes`);
+    the GIN index is then built concurrently. Postgres keeps the column up to
+    date on every INSERT/UPDATE afterwards.
+    """
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'review_fts'"
+            )).first()
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS review_fts USING fts5("
+                "review_text, ai_summary, ai_recommended_action, "
+                "content='Review 1', content_rowid='rowid', tokenize='porter unicode61')"
+            ))
+            for statement in _SQLITE_DDL:
+                conn.execute(text(statement))
+            if not exists:
+                # Index rows that were inserted before the triggers existed
+                conn.execute(text("INSERT INTO review_fts(review_fts) VALUES ('rebuild')"))
+        return
+
+    # partitioning.py imports this module
+    from partitioning import ensure_index
+
+    with engine.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'Review 1' AND column_name = 'search_vector'"
+        )).first()
+        if not exists:
+            conn.execute(text(f'ALTER TABLE "Review 1" ADD COLUMN {PG_SEARCH_COLUMN}'))
+    ensure_index(engine, PG_SEARCH_INDEX, ["search_vector"], method="gin")
+
+
+# An optionally negated "phrase" (closing quote optional), or a bare word
+_WEBSEARCH_TOKEN = re.compile(r'(-?)"([^"]*)"?|(\S+)')
+
+
+def _fts5_string(value: str):
+    return '"' + value.replace('"', '""') + '"'
+
+
+def _fts5_query(q: str):
+    """
+    Translate websearch_to_tsquery syntax to an FTS5 query, or None if nothing
+    is left to match. Terms and phrases are always quoted, so user input can't
+    inject other FTS5 syntax.
+    """
+    # Each OR-separated group: (terms to match, terms to exclude)
+    groups = [([], [])]
+    for match in _WEBSEARCH_TOKEN.finditer(q):
+        negate, phrase, word = match.groups()
+        if word is not None:
+            if word.lower() == "or":
+                groups.append(([], []))
+                continue
+            negate = word.startswith("-") and len(word) > 1
+            phrase = word[1:] if negate else word
+        if not phrase.strip():
+            continue
+        terms, excluded = groups[-1]
+        (excluded if negate else terms).append(_fts5_string(phrase))
+
+    # NOT binds tighter than AND, which binds tighter than OR, as in tsquery
+    clauses = [
+        " ".join(terms) + "".join(f" NOT {term}" for term in excluded)
+        for terms, excluded in groups if terms
+    ]
+    return " OR ".join(f"({clause})" for clause in clauses) or None
+
+
+def search_reviews(db: Session, q: str, min_rating: Optional[int] = None,
+                   max_rating: Optional[int] = None, start_date: Optional[datetime] = None,
+                   end_date: Optional[datetime] = None, limit: int = 20, offset: int = 0):
+    """
+    Ranked full-text search. Returns (rows, total_count, total_count_capped)
+    where each row is a mapping with the ReviewDetail columns plus `relevance`
+    (higher is better).
+    """
+    params = {"q": q, "limit": limit, "offset": offset}
+    filters = []
+    if min_rating is not None:
+        filters.append("r.rating >= :min_rating")
+        params["min_rating"] = min_rating
+    if max_rating is not None:
+        filters.append("r.rating <= :max_rating")
+        params["max_rating"] = max_rating
+    if start_date is not None:
+        filters.append("r.created_at >= :start_date")
+        params["start_date"] = start_date
+    if end_date is not None:
+        filters.append("r.created_at < :end_date")
+        params["end_date"] = end_date
+    extra_filters = "".join(f" AND {clause}" for clause in filters)
+
+    if db.get_bind().dialect.name == "sqlite":
+        params["q"] = _fts5_query(q)
+        if params["q"] is None:
+            return [], 0, False
+        rank = "m.relevance"
+        from_where = f"""
+            FROM (
+                SELECT rowid, -bm25(review_fts, 3.0, 2.0, 1.0) AS relevance
+                FROM review_fts WHERE review_fts MATCH :q
+            ) AS m JOIN "Review 1" r ON r.rowid = m.rowid
+            WHERE 1 = 1{extra_filters}
+        """
+    else:
+        rank = "ts_rank_cd(r.search_vector, query)"
+        from_where = f"""
+            FROM "Review 1" r, websearch_to_tsquery('{SEARCH_CONFIG}', :q) AS query
+            WHERE r.search_vector @@ query{extra_filters}
+        """
+
+    rows = db.execute(text(f"""
+        SELECT {_REVIEW_COLUMNS}, {rank} AS relevance
+        {from_where}
+        ORDER BY relevance DESC, r.created_at DESC
+        LIMIT :limit OFFSET :offset
+    """), params).mappings().all()
+
+    if 0 < len(rows) < limit or (offset == 0 and not rows):
+        # Last page: the count is known without another query
+        return rows, offset + len(rows), False
+
+    # Count up to one past the cap, so "more than the cap" is still detected
+    count_limit = max(SEARCH_COUNT_LIMIT, offset + limit)
+    total_count = db.execute(
+        text(f"SELECT count(*) FROM (SELECT 1 {from_where} LIMIT :count_limit) AS matches"),
+        {**params, "count_limit": count_limit + 1}
+    ).scalar()
+    if total_count > count_limit:
+        return rows, count_limit, True
+    return rows, total_count, False
@@ -0,0 +1,315 @@
+"""
+Hierarchical (map-reduce) sentiment analysis over the full review history.
+
+A single prompt can only hold ~20 reviews, so the history is split into chunks
+of at most CHUNK_SIZE reviews within a calendar month (chunk_by=size) or a
+calendar day (chunk_by=day). Each chunk is summarized into a small digest in
+parallel (map), digests are merged in groups until they fit in one prompt, and
+the final reduce produces a SentimentAnalysisResponse payload.
+
+Digests of closed chunks never change, so they are cached permanently in
+SentimentChunkSummary. Once warm, a new review only costs one digest for the
+open tail chunk plus the merges above it and the reduce. Chunks and first-level
+merge groups never cross their month (day) or year (month) boundary, so a
+review that appears late (enriched after degraded mode) or disappears
+(archived) only changes the chunks of its own period.
+
+Chunks are keyed on review ids alone, so only ids, ratings and timestamps are
+loaded for the whole range; summaries are fetched just for chunks that miss
+the cache. Chunks in a period the requested range only partly covers (e.g. a
+start_date mid-month) are summarized but never cached, since no other range
+produces the same chunk.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
+from typing import Optional
+from dotenv import load_dotenv
+import hashlib
+import json
+import os
+
+from models import Review, SentimentChunkSummary
+from analytics import chunk_summary_chain, chunk_merge_chain, sentiment_reduce_chain
+
+load_dotenv()
+
+# Max reviews per chunk (within a month, or a day with chunk_by=day)
+CHUNK_SIZE = int(os.getenv("SENTIMENT_CHUNK_SIZE", "50"))
+# Max digests merged by a single LLM call
+REDUCE_FAN_IN = int(os.getenv("SENTIMENT_REDUCE_FAN_IN", "20"))
+# Parallel LLM calls during the map and merge steps
+MAX_CONCURRENCY = int(os.getenv("SENTIMENT_MAX_CONCURRENCY", "4"))
+# Review ids per query when fetching summaries for uncached chunks
+SUMMARY_FETCH_BATCH = 500
+
+CHUNK_BY_OPTIONS = ("size", "day")
+
+
+def _hash_keys(parts):
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _load_reviews(db: Session, start_date: Optional[datetime], end_date: Optional[datetime]):
+    # Chunk keys and metadata only; summaries are loaded per uncached chunk
+    query = db.query(
+        Review.id, Review.rating, Review.created_at
+    ).filter(Review.ai_summary.isnot(None))
+
+    if start_date:
+        query = query.filter(Review.created_at >= start_date)
+    if end_date:
+        query = query.filter(Review.created_at < end_date)
+
+    return query.order_by(Review.created_at.asc(), Review.id.asc()).all()
+
+
+def _bucket(moment: datetime, chunk_by: str):
+    """Calendar period a chunk may not cross: the day, or the month for chunk_by=size."""
+    day = moment.date()
+    return day if chunk_by == "day" else day.replace(day=1)
+
+
+def _period_bounds(bucket, chunk_by: str):
+    """[start, end) of a chunk period as datetimes."""
+    start = datetime.combine(bucket, datetime.min.time())
+    if chunk_by == "day":
+        return start, start + timedelta(days=1)
+    return start, (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _parent_bucket(bucket, chunk_by: str):
+    """Period first-level merge groups may not cross: the month, or the year."""
+    return bucket.replace(day=1) if chunk_by == "day" else bucket.replace(month=1, day=1)
+
+
+def _make_chunks(rows, chunk_by: str, start_date: Optional[datetime] = None,
+                 end_date: Optional[datetime] = None):
+    """
+    Split rows (oldest first) into chunks of at most CHUNK_SIZE within a period.
+    A chunk is "closed" (cacheable) once no new review can ever land in it: it
+    is full, or its period is over. Chunks of a period that [start_date,
+    end_date) only partly covers are never closed.
+    """
+    current = _bucket(datetime.utcnow(), chunk_by)
+    groups = []
+    for row in rows:
+        bucket = _bucket(row.created_at, chunk_by)
+        if not groups or groups[-1][0] != bucket or len(groups[-1][1]) == CHUNK_SIZE:
+            groups.append((bucket, []))
+        groups[-1][1].append(row)
+
+    chunks = []
+    for bucket, batch in groups:
+        period_start, period_end = _period_bounds(bucket, chunk_by)
+        covered = (
+            (start_date is None or start_date <= period_start)
+            and (end_date is None or end_date >= period_end)
+        )
+        chunks.append({
+            "key": _hash_keys([str(row.id) for row in batch]),
+            "rows": batch,
+            "closed": covered and (len(batch) == CHUNK_SIZE or bucket < current),
+            "bucket": bucket,
+            "review_count": len(batch),
+            "average_rating": sum(row.rating for row in batch) / len(batch),
+            "period_start": batch[0].created_at,
+            "period_end": batch[-1].created_at,
+        })
+    return chunks
+
+
+def _load_summaries(db: Session, chunks):
+    """Set chunk["summaries"] (aligned with chunk["rows"]) for the given chunks."""
+    ids = [row.id for chunk in chunks for row in chunk["rows"]]
+    summaries = {}
+    for i in range(0, len(ids), SUMMARY_FETCH_BATCH):
+        summaries.update(
+            db.query(Review.id, Review.ai_summary)
+            .filter(Review.id.in_(ids[i:i + SUMMARY_FETCH_BATCH]))
+            .all()
+        )
+    for chunk in chunks:
+        chunk["summaries"] = [summaries.get(row.id) for row in chunk["rows"]]
+
+
+def _format_reviews(chunk):
+    return "\n\n".join(
+        f"Rating: {row.rating}/5\nSummary: {summary}"
+        for row, summary in zip(chunk["rows"], chunk["summaries"])
+    )
+
+
+def _format_digests(nodes):
+    digests_data = []
+    for i, node in enumerate(nodes, 1):
+        digest = node["digest"]
+        digests_data.append(
+            f"{i}. {node['period_start']:%Y-%m-%d} to {node['period_end']:%Y-%m-%d} | "
+            f"Reviews: {node['review_count']} | Average rating: {node['average_rating']:.2f}/5 | "
+            f"Score: {digest.get('sentiment_score')}/100\n"
+            f"Themes: {', '.join(digest.get('key_themes', []))}\n"
+            f"Summary: {digest.get('summary', '')}"
+        )
+    return "\n\n".join(digests_data)
+
+
+def _resolve_nodes(db: Session, nodes, chain, build_input, prepare=None):
+    """
+    Fill in node["digest"] from the cache, or by calling `chain` in parallel
+    for the misses. Digests of closed nodes are written back to the cache.
+    prepare(missing nodes) runs before their inputs are built.
+    """
+    keys = [node["key"] for node in nodes if node["closed"]]
+    cached = {}
+    if keys:
+        for entry in db.query(SentimentChunkSummary).filter(
+            SentimentChunkSummary.chunk_key.in_(keys)
+        ):
+            cached[entry.chunk_key] = json.loads(entry.digest)
+
+    missing = []
+    for node in nodes:
+        if node["key"] in cached:
+            node["digest"] = cached[node["key"]]
+        else:
+            missing.append(node)
+
+    if not missing:
+        return nodes
+
+    if prepare:
+        prepare(missing)
+    outputs = chain.batch(
+        [build_input(node) for node in missing],
+        config={"max_concurrency": MAX_CONCURRENCY}
+    )
+
+    now = datetime.utcnow()
+    for node, digest in zip(missing, outputs):
+        node["digest"] = digest
+        if node["closed"]:
+            db.add(SentimentChunkSummary(
+                chunk_key=node["key"],
+                review_count=node["review_count"],
+                average_rating=node["average_rating"],
+                period_start=node["period_start"],
+                period_end=node["period_end"],
+                digest=json.dumps(digest),
+                created_at=now
+            ))
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request cached the same chunk first; its digest is equivalent
+        db.rollback()
+
+    return nodes
+
+
+def _merge_group(group):
+    review_count = sum(node["review_count"] for node in group)
+    return {
+        "key": _hash_keys([node["key"] for node in group]),
+        "children": group,
+        "closed": all(node["closed"] for node in group),
+        "bucket": group[0]["bucket"],
+        "review_count": review_count,
+        "average_rating": sum(
+            node["average_rating"] * node["review_count"] for node in group
+        ) / review_count,
+        "period_start": group[0]["period_start"],
+        "period_end": group[-1]["period_end"],
+    }
+
+
+def _group_nodes(nodes, period_of):
+    """
+    Split nodes into groups of at most REDUCE_FAN_IN that never span two
+    periods (period_of(node)), so a change in one period leaves the groups of
+    the others, and their cached digests, untouched.
+    """
+    runs = []
+    for node in nodes:
+        if not runs or period_of(runs[-1][-1]) != period_of(node):
+            runs.append([])
+        runs[-1].append(node)
+    return [
+        run[i:i + REDUCE_FAN_IN]
+        for run in runs
+        for i in range(0, len(run), REDUCE_FAN_IN)
+    ]
+
+
+def summarize_chunks(db: Session, start_date: Optional[datetime] = None,
+                     end_date: Optional[datetime] = None, chunk_by: str = "size",
+                     closed_only: bool = False):
+    """
+    Map step, plus intermediate merges until at most REDUCE_FAN_IN digests remain.
+    Returns (digest nodes, number of reviews covered).
+
+    With closed_only, only closed (cacheable) nodes are summarized; open nodes
+    are returned without a "digest". Used to warm the cache without paying for
+    digests that are thrown away.
+    """
+    rows = _load_reviews(db, start_date, end_date)
+    if not rows:
+        return [], 0
+
+    def resolve(nodes, chain, build_input, prepare=None):
+        # Fills in node["digest"] in place
+        _resolve_nodes(
+            db,
+            [node for node in nodes if node["closed"] or not closed_only],
+            chain,
+            build_input,
+            prepare
+        )
+
+    nodes = _make_chunks(rows, chunk_by, start_date, end_date)
+    resolve(
+        nodes,
+        chunk_summary_chain,
+        lambda node: {"reviews_data": _format_reviews(node)},
+        lambda missing: _load_summaries(db, missing)
+    )
+
+    # First merge level stays within a year (month with chunk_by=day); levels
+    # above it only have a handful of nodes, so positional groups are fine
+    period_of = lambda node: _parent_bucket(node["bucket"], chunk_by)
+    while len(nodes) > REDUCE_FAN_IN:
+        groups = _group_nodes(nodes, period_of)
+        if len(groups) == len(nodes):
+            # Every period has a single node: nothing to merge within periods
+            groups = _group_nodes(nodes, lambda node: None)
+        period_of = lambda node: None
+
+        # A group of one needs no LLM call; pass the node through
+        merged = {id(group): _merge_group(group) for group in groups if len(group) > 1}
+        resolve(
+            list(merged.values()),
+            chunk_merge_chain,
+            lambda node: {"digests_data": _format_digests(node["children"])}
+        )
+        nodes = [merged.get(id(group), group[0]) for group in groups]
+
+    return nodes, len(rows)
+
+
+def hierarchical_sentiment(db: Session, start_date: Optional[datetime] = None,
+                           end_date: Optional[datetime] = None, chunk_by: str = "size"):
+    """
+    Overall sentiment for every review in [start_date, end_date).
+    Returns None when there are no reviews in range.
+    """
+    nodes, total_reviews = summarize_chunks(db, start_date, end_date, chunk_by)
+    if not nodes:
+        return None
+
+    sentiment_output = sentiment_reduce_chain.invoke({
+        "digests_data": _format_digests(nodes)
+    })
+    sentiment_output["total_reviews_analyzed"] = total_reviews
+
+    return sentiment_output
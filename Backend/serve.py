@@ -0,0 +1,42 @@
+"""
+Production entry point: runs main:app in several uvicorn worker processes.
+
+    python serve.py
+
+- WEB_CONCURRENCY: worker processes (default 2; always 1 on SQLite). Each can
+  open DB_POOL_SIZE + DB_MAX_OVERFLOW connections, so keep the total under the
+  database's connection limit.
+- PORT: listen port (default 4000; set by Render)
+- FORWARDED_ALLOW_IPS: proxy addresses whose X-Forwarded-For is trusted
+  (default 127.0.0.1). Uvicorn takes the client address from the rightmost
+  entry not added by one of these, so never set it to "*" on a public port.
+
+Each worker has its own DB pool and admission limits (ADMISSION_MAX_IN_FLIGHT
+is per worker). Background jobs run in one worker at a time, see jobs.py.
+"""
+from dotenv import load_dotenv
+import os
+
+import uvicorn
+
+from database import IS_SQLITE
+
+load_dotenv()
+
+if IS_SQLITE:
+    # SQLite can't coordinate jobs across processes (no FOR UPDATE)
+    WORKERS = 1
+else:
+    # Not os.cpu_count(): in containers it reports the host's cores
+    WORKERS = int(os.getenv("WEB_CONCURRENCY", "2"))
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "4000")),
+        workers=WORKERS,
+        proxy_headers=True,             # Client IPs behind Render's proxy
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        log_level=os.getenv("LOG_LEVEL", "info")
+    )
@@ -0,0 +1,207 @@
+"""
+Structured LLM output with cheap recovery instead of silent fallbacks.
+
+structured_chain() replaces `prompt | model | JsonOutputParser()` and returns
+a dict validated against a Pydantic model from schemas.py:
+
+1. Structured-output mode (LLM_STRUCTURED_OUTPUT=json_schema|function_calling|
+   json_mode) asks the provider to enforce the schema. Default "off" keeps
+   plain prompting, which every OpenRouter model supports.
+2. Near-valid JSON (code fences, prose around the object, trailing commas,
+   truncation) is repaired locally.
+3. If fields are still missing or invalid, the model is re-asked for only
+   those fields, with its previous reply in context.
+
+Every outcome is counted in parse_stats (see GET /api/admin/llm-stats).
+"""
+from collections import Counter, defaultdict
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.exceptions import OutputParserException
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.json import parse_partial_json
+from pydantic import BaseModel, ValidationError
+from dotenv import load_dotenv
+from typing import Optional, Type
+import json
+import os
+import re
+import threading
+
+load_dotenv()
+
+STRUCTURED_OUTPUT_MODE = os.getenv("LLM_STRUCTURED_OUTPUT", "off")
+STRUCTURED_OUTPUT_MODES = ("off", "json_schema", "function_calling", "json_mode")
+if STRUCTURED_OUTPUT_MODE not in STRUCTURED_OUTPUT_MODES:
+    raise ValueError(f"LLM_STRUCTURED_OUTPUT must be one of {STRUCTURED_OUTPUT_MODES}")
+
+
+class ParseStats:
+    """Thread-safe per-chain outcome counters."""
+
+    def __init__(self):
+        self._counts = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+    def record(self, name: str, outcome: str):
+        with self._lock:
+            self._counts[name][outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(counts) for name, counts in self._counts.items()}
+
+
+parse_stats = ParseStats()
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+def repair_json(text) -> Optional[dict]:
+    """Best-effort parse of near-valid JSON into a dict; None if hopeless."""
+    if not isinstance(text, str):
+        return None
+
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    start = text.find("{")
+    if start == -1:
+        return None
+    end = text.rfind("}")
+    if end > start:
+        candidate = text[start:end + 1]
+        for attempt in (candidate, _TRAILING_COMMA.sub(r"\1", candidate)):
+            try:
+                data = json.loads(attempt, strict=False)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, dict):
+                return data
+
+    # Truncated object: let the partial parser close it, but drop the last
+    # field since its value was probably cut off mid-way
+    try:
+        data = parse_partial_json(text[start:])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    if data:
+        data.pop(next(reversed(data)))
+    return data
+
+
+def _invalid_fields(schema: Type[BaseModel], data: dict):
+    try:
+        schema.model_validate(data)
+        return []
+    except ValidationError as e:
+        return sorted({str(error["loc"][0]) for error in e.errors() if error["loc"]})
+
+
+def _field_format(schema: Type[BaseModel], fields):
+    full_schema = schema.model_json_schema()
+    subset = {
+        "type": "object",
+        "properties": {field: full_schema["properties"][field] for field in fields},
+        "required": list(fields),
+    }
+    if "$defs" in full_schema:
+        subset["$defs"] = full_schema["$defs"]
+    return json.dumps(subset, indent=2)
+
+
+def reask_missing(name: str, model, messages, schema: Type[BaseModel], data: dict,
+                  previous_reply: str = ""):
+    """
+    Re-ask the model for only the fields of `data` that are missing or invalid.
+    Returns the merged, validated dict; raises OutputParserException if still invalid.
+    """
+    fields = _invalid_fields(schema, data)
+    if not fields:
+        return schema.model_validate(data).model_dump()
+
+    parse_stats.record(name, "reasked")
+    request = (
+        "Your previous reply was missing or had invalid values for these fields: "
+        f"{', '.join(fields)}.\n"
+        "Reply with ONLY a JSON object containing exactly these fields, following this JSON schema:\n"
+        f"{_field_format(schema, fields)}"
+    )
+    try:
+        reply = model.invoke(list(messages) + [
+            AIMessage(content=previous_reply or json.dumps(data)),
+            HumanMessage(content=request),
+        ])
+    except Exception:
+        parse_stats.record(name, "failed")
+        raise
+    patch = repair_json(reply.content) or {}
+    merged = {**{k: v for k, v in data.items() if k not in fields}, **{k: patch[k] for k in fields if k in patch}}
+
+    try:
+        return schema.model_validate(merged).model_dump()
+    except ValidationError as e:
+        parse_stats.record(name, "failed")
+        raise OutputParserException(f"{name}: invalid LLM output after re-ask: {e}") from e
+
+
+def complete_output(name: str, model, messages, schema: Type[BaseModel], data: dict):
+    """Validate an already-parsed output (e.g. from a stream), re-asking only for bad fields."""
+    parse_stats.record(name, "calls")
+    if not _invalid_fields(schema, data):
+        parse_stats.record(name, "parsed")
+        return schema.model_validate(data).model_dump()
+    return reask_missing(name, model, messages, schema, data)
+
+
+def structured_chain(name: str, prompt, model, schema: Type[BaseModel]):
+    """
+    Runnable with the same interface as `prompt | model | JsonOutputParser()`
+    (invoke/batch with the prompt variables, returns a dict), validated
+    against `schema`.
+    """
+    if STRUCTURED_OUTPUT_MODE != "off":
+        structured_model = model.with_structured_output(
+            schema, method=STRUCTURED_OUTPUT_MODE, include_raw=True
+        )
+
+    def run(inputs: dict):
+        parse_stats.record(name, "calls")
+        messages = prompt.invoke(inputs).to_messages()
+
+        if STRUCTURED_OUTPUT_MODE != "off":
+            result = structured_model.invoke(messages)
+            if result["parsed"] is not None:
+                parse_stats.record(name, "native")
+                return result["parsed"].model_dump()
+            raw = result["raw"]
+            # Tool-calling providers put the arguments on the message, not in content
+            tool_args = raw.tool_calls[0]["args"] if getattr(raw, "tool_calls", None) else None
+            text = raw.content if isinstance(raw.content, str) else ""
+        else:
+            raw = model.invoke(messages)
+            tool_args = None
+            text = raw.content if isinstance(raw.content, str) else ""
+
+        if tool_args is not None:
+            data = tool_args
+        else:
+            try:
+                data = json.loads(text)
+            except json.JSONDecodeError:
+                data = None
+
+        if isinstance(data, dict) and not _invalid_fields(schema, data):
+            parse_stats.record(name, "parsed")
+            return schema.model_validate(data).model_dump()
+
+        repaired = data if isinstance(data, dict) else repair_json(text)
+        if repaired is not None and not _invalid_fields(schema, repaired):
+            parse_stats.record(name, "repaired")
+            return schema.model_validate(repaired).model_dump()
+
+        return reask_missing(name, model, messages, schema, repaired or {}, text)
+
+    return RunnableLambda(run, name=name)
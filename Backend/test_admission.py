@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+
+import admission
+from admission import EnrichmentLimiter, TokenBucketLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+def _wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def test_token_bucket_burst_then_retry_after(clock):
+    limiter = TokenBucketLimiter(rate_per_second=0.5, burst=2)
+    assert limiter.try_acquire("a") == 0
+    assert limiter.try_acquire("a") == 0
+    assert limiter.try_acquire("a") == pytest.approx(2.0)
+    # Other clients have their own bucket
+    assert limiter.try_acquire("b") == 0
+
+
+def test_token_bucket_refills_over_time(clock):
+    limiter = TokenBucketLimiter(rate_per_second=0.5, burst=2)
+    limiter.try_acquire("a")
+    limiter.try_acquire("a")
+    clock.now += 1
+    assert limiter.try_acquire("a") == pytest.approx(1.0)
+    clock.now += 1
+    assert limiter.try_acquire("a") == 0
+    # Refill is capped at the burst size
+    clock.now += 100
+    assert limiter.try_acquire("a") == 0
+    assert limiter.try_acquire("a") == 0
+    assert limiter.try_acquire("a") > 0
+
+
+def test_token_bucket_evicts_least_recently_used(clock):
+    limiter = TokenBucketLimiter(rate_per_second=0.5, burst=1, max_clients=2)
+    limiter.try_acquire("a")
+    limiter.try_acquire("b")
+    assert limiter.try_acquire("a") > 0  # touches "a"
+    limiter.try_acquire("c")  # evicts "b"
+    assert set(limiter._buckets) == {"a", "c"}
+    assert limiter.try_acquire("b") == 0
+
+
+def test_enrichment_limiter_slots():
+    limiter = EnrichmentLimiter(max_in_flight=2, max_queue=0, queue_timeout=1)
+    assert limiter.acquire() and limiter.acquire()
+    assert not limiter.acquire()
+    assert not limiter.try_acquire()
+    limiter.release()
+    assert limiter.try_acquire()
+    assert limiter.stats()["in_flight"] == 2
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_enrichment_limiter_queue_bound():
+    limiter = EnrichmentLimiter(max_in_flight=1, max_queue=1, queue_timeout=2)
+    assert limiter.acquire()
+    waiter = threading.Thread(target=limiter.acquire)
+    waiter.start()
+    _wait_until(lambda: limiter.stats()["waiting"] == 1)
+
+    started = time.monotonic()
+    assert not limiter.acquire()  # queue full: rejected without waiting
+    assert time.monotonic() - started < 0.5
+    assert not limiter.has_capacity()
+
+    limiter.release()
+    waiter.join()
+    assert limiter.stats()["in_flight"] == 1
+
+
+def test_enrichment_limiter_queue_timeout():
+    limiter = EnrichmentLimiter(max_in_flight=1, max_queue=1, queue_timeout=0.05)
+    assert limiter.acquire()
+    assert not limiter.acquire()
+    stats = limiter.stats()
+    assert stats["waiting"] == 0
+    assert stats["rejected"] == 1
+
+
+def test_enrichment_limiter_waiters_go_first():
+    limiter = EnrichmentLimiter(max_in_flight=1, max_queue=4, queue_timeout=2)
+    assert limiter.acquire()
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(limiter.acquire()))
+    waiter.start()
+    _wait_until(lambda: limiter.stats()["waiting"] == 1)
+
+    # Background work never takes a slot ahead of a queued request
+    assert not limiter.try_acquire()
+    limiter.release()
+    waiter.join()
+    assert results == [True]
+    assert not limiter.try_acquire()
+    limiter.release()
+    assert limiter.try_acquire()
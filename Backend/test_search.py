@@ -0,0 +1,41 @@
+from search import _fts5_query
+
+
+def test_plain_terms_are_quoted_and_anded():
+    assert _fts5_query("slow delivery") == '("slow" "delivery")'
+
+
+def test_phrase_is_one_term():
+    assert _fts5_query('"late order" refund') == '("late order" "refund")'
+
+
+def test_unterminated_phrase_runs_to_the_end():
+    assert _fts5_query('"late order') == '("late order")'
+
+
+def test_excluded_terms_bind_to_their_group():
+    assert _fts5_query("pizza -cold") == '("pizza" NOT "cold")'
+    assert _fts5_query('pizza -"too cold"') == '("pizza" NOT "too cold")'
+
+
+def test_or_splits_groups():
+    assert _fts5_query("pizza -cold or burger") == '("pizza" NOT "cold") OR ("burger")'
+    assert _fts5_query("a b OR c") == '("a" "b") OR ("c")'
+
+
+def test_groups_without_positive_terms_are_dropped():
+    assert _fts5_query("-cold or burger") == '("burger")'
+    assert _fts5_query("-cold") is None
+    assert _fts5_query("or") is None
+    assert _fts5_query('""') is None
+    assert _fts5_query("") is None
+
+
+def test_lone_dash_is_a_term():
+    assert _fts5_query("a -") == '("a" "-")'
+
+
+def test_fts5_syntax_is_quoted():
+    assert _fts5_query('NEAR(a b) col:x*') == '("NEAR(a" "b)" "col:x*")'
+    assert _fts5_query('say "hi""') == '("say" "hi")'
+    assert _fts5_query('it"s') == '("it""s")'
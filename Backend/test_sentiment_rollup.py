@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import uuid
+
+import pytest
+
+import sentiment_rollup
+from sentiment_rollup import _group_nodes, _make_chunks, _merge_group
+
+
+def _rows(start, count, step=timedelta(hours=1), rating=4):
+    return [
+        SimpleNamespace(id=uuid.uuid4(), rating=rating, created_at=start + step * i)
+        for i in range(count)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(sentiment_rollup, "CHUNK_SIZE", 3)
+    monkeypatch.setattr(sentiment_rollup, "REDUCE_FAN_IN", 2)
+
+
+def test_chunks_split_on_size_and_month():
+    rows = _rows(datetime(2024, 1, 30), 4, step=timedelta(hours=12)) + _rows(datetime(2024, 2, 2), 1)
+    chunks = _make_chunks(rows, "size")
+
+    # Jan 30 00:00, 12:00, Jan 31 00:00 | Jan 31 12:00 | Feb 2
+    assert [chunk["review_count"] for chunk in chunks] == [3, 1, 1]
+    assert [chunk["bucket"] for chunk in chunks] == [
+        datetime(2024, 1, 1).date(), datetime(2024, 1, 1).date(), datetime(2024, 2, 1).date()
+    ]
+    assert chunks[0]["period_start"] == rows[0].created_at
+    assert chunks[0]["period_end"] == rows[2].created_at
+    assert all(chunk["closed"] for chunk in chunks)
+
+
+def test_chunk_by_day_splits_on_day():
+    rows = _rows(datetime(2024, 1, 30, 22), 4)
+    assert [chunk["review_count"] for chunk in _make_chunks(rows, "day")] == [2, 2]
+
+
+def test_chunk_keys_depend_on_ids_only():
+    rows = _rows(datetime(2024, 1, 1), 3)
+    first = _make_chunks(rows, "size")[0]["key"]
+    for row in rows:
+        row.rating = 1
+    assert _make_chunks(rows, "size")[0]["key"] == first
+    rows[0].id = uuid.uuid4()
+    assert _make_chunks(rows, "size")[0]["key"] != first
+
+
+def test_current_period_is_open_until_full():
+    now = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    chunks = _make_chunks(_rows(now, 4, step=timedelta(seconds=1)), "size")
+    assert [chunk["closed"] for chunk in chunks] == [True, False]
+
+
+def test_partly_covered_periods_are_never_closed():
+    rows = _rows(datetime(2024, 1, 15), 2) + _rows(datetime(2024, 2, 1), 3) + _rows(datetime(2024, 3, 1), 1)
+
+    chunks = _make_chunks(rows, "size", start_date=datetime(2024, 1, 15),
+                          end_date=datetime(2024, 3, 10))
+    assert [chunk["closed"] for chunk in chunks] == [False, True, False]
+
+    # Range boundaries on the calendar periods keep every chunk cacheable
+    chunks = _make_chunks(rows, "size", start_date=datetime(2024, 1, 1),
+                          end_date=datetime(2024, 4, 1))
+    assert all(chunk["closed"] for chunk in chunks)
+
+
+def test_group_nodes_respects_periods_and_fan_in():
+    nodes = [{"period": period} for period in "aaabbc"]
+    groups = _group_nodes(nodes, lambda node: node["period"])
+    assert [[node["period"] for node in group] for group in groups] == [
+        ["a", "a"], ["a"], ["b", "b"], ["c"]
+    ]
+
+
+def test_merge_group_weights_and_closed():
+    rows = _rows(datetime(2024, 1, 1), 3, rating=5) + _rows(datetime(2024, 1, 2), 1, rating=1)
+    chunks = _make_chunks(rows, "size", start_date=datetime(2024, 1, 1, 12))
+    merged = _merge_group(chunks)
+
+    assert merged["review_count"] == 4
+    assert merged["average_rating"] == 4
+    assert merged["period_start"] == rows[0].created_at
+    assert merged["period_end"] == rows[-1].created_at
+    # One child is not cacheable, so neither is the merge
+    assert not merged["closed"]
+    assert merged["children"] == chunks
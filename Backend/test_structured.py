@@ -0,0 +1,97 @@
+import pytest
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import AIMessage, HumanMessage
+from pydantic import BaseModel
+
+from structured import parse_stats, reask_missing, repair_json
+
+
+class Output(BaseModel):
+    summary: str
+    score: int
+    action: str
+
+
+class FakeModel:
+    """Returns canned replies in order and keeps the messages it was sent."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    def invoke(self, messages):
+        self.calls.append(messages)
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return AIMessage(content=reply)
+
+
+def test_repair_json_valid_and_fenced():
+    assert repair_json('{"a": 1}') == {"a": 1}
+    assert repair_json('Sure!\n```json\n{"a": 1}\n```\nDone.') == {"a": 1}
+    assert repair_json('Here it is: {"a": 1} hope that helps') == {"a": 1}
+
+
+def test_repair_json_trailing_comma():
+    assert repair_json('{"a": [1, 2,], "b": 2,}') == {"a": [1, 2], "b": 2}
+
+
+def test_repair_json_truncated_drops_last_field():
+    assert repair_json('{"summary": "ok", "score": 4, "action": "Keep the') == {
+        "summary": "ok", "score": 4
+    }
+    # A cut-off number may be incomplete too
+    assert repair_json('{"summary": "ok", "score": 4') == {"summary": "ok"}
+
+
+def test_repair_json_hopeless():
+    assert repair_json("no json here") is None
+    assert repair_json("[1, 2]") is None
+    assert repair_json(None) is None
+    assert repair_json('{"a"') == {}
+
+
+def test_reask_missing_merges_only_missing_fields():
+    model = FakeModel('{"action": "Reply to the customer", "summary": "ignored"}')
+    messages = [HumanMessage(content="review")]
+    data = {"summary": "ok", "score": 4}
+
+    result = reask_missing("test_merge", model, messages, Output, data)
+
+    assert result == {"summary": "ok", "score": 4, "action": "Reply to the customer"}
+    sent = model.calls[0]
+    assert sent[0] is messages[0]
+    assert isinstance(sent[1], AIMessage)
+    assert "these fields: action." in sent[2].content
+    assert parse_stats.snapshot()["test_merge"] == {"reasked": 1}
+
+
+def test_reask_missing_replaces_invalid_fields():
+    model = FakeModel('{"score": 2}')
+    result = reask_missing(
+        "test_invalid", model, [], Output,
+        {"summary": "ok", "score": "four", "action": "a"}
+    )
+    assert result["score"] == 2
+
+
+def test_reask_missing_without_missing_fields_does_not_call_model():
+    model = FakeModel()
+    data = {"summary": "ok", "score": 4, "action": "a"}
+    assert reask_missing("test_valid", model, [], Output, data) == data
+    assert model.calls == []
+
+
+def test_reask_missing_still_invalid_raises():
+    model = FakeModel("I can't do that")
+    with pytest.raises(OutputParserException):
+        reask_missing("test_still_invalid", model, [], Output, {"summary": "ok"})
+    assert parse_stats.snapshot()["test_still_invalid"] == {"reasked": 1, "failed": 1}
+
+
+def test_reask_missing_model_error_is_recorded():
+    model = FakeModel(RuntimeError("provider down"))
+    with pytest.raises(RuntimeError):
+        reask_missing("test_model_error", model, [], Output, {"summary": "ok"})
+    assert parse_stats.snapshot()["test_model_error"] == {"reasked": 1, "failed": 1}
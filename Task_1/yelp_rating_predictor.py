@@ -26,8 +26,15 @@ model = init_chat_model(
 )
 
 # Load the dataset
+# Set REVIEWS_EXPORT_URL to evaluate on production reviews streamed from the backend, e.g.
+# https://review-predictor-using-llm.onrender.com/api/admin/reviews/export?format=csv
+REVIEWS_EXPORT_URL = getenv("REVIEWS_EXPORT_URL")
 print("Loading dataset...")
-df = pd.read_csv("yelp.csv")
+if REVIEWS_EXPORT_URL:
+    df = pd.read_csv(REVIEWS_EXPORT_URL).rename(columns={"review_text": "text", "rating": "stars"})
+    df = df.dropna(subset=["text"])
+else:
+    df = pd.read_csv("yelp.csv")
 print(f"Total reviews in dataset: {len(df)}")
 
 # Sample 150 reviews with fixed random state for reproducibility
@@ -35,7 +42,7 @@ SAMPLE_SIZE = 150
 BATCH_SIZE = 10
 DELAY_SECONDS = 10
 
-df_sample = df[['text', 'stars']].sample(n=SAMPLE_SIZE, random_state=42).reset_index(drop=True)
+df_sample = df[['text', 'stars']].sample(n=min(SAMPLE_SIZE, len(df)), random_state=42).reset_index(drop=True)
 print(f"Sample size: {len(df_sample)}")
 
 # System prompt for rating prediction
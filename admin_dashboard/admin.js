@@ -23,19 +23,18 @@ function createStars(count) {
     return '★'.repeat(count) + '☆'.repeat(5 - count);
 }
 
-// Initialize or update Chart.js ratings chart
-async function updateRatingsChart() {
-    const ratingsData = await fetchData('/analytics/ratings');
+function escapeHtml(value) {
+    return String(value ?? '').replace(/[&<>"']/g, ch => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[ch]);
+}
 
-    if (!ratingsData || !ratingsData.ratings) return;
+// Initialize or update Chart.js ratings chart
+function updateRatingsChart(ratingsData) {
+    if (!ratingsData || !ratingsData.rating_counts) return;
 
-    // Count occurrences of each rating (handle 0 ratings as invalid)
-    const ratingCounts = [0, 0, 0, 0, 0]; // For ratings 1-5
-    ratingsData.ratings.forEach(rating => {
-        if (rating >= 1 && rating <= 5) {
-            ratingCounts[rating - 1]++;
-        }
-    });
+    // Counts per rating 1-5, aggregated by the backend
+    const ratingCounts = [1, 2, 3, 4, 5].map(rating => ratingsData.rating_counts[rating] || 0);
 
     const ctx = document.getElementById('ratingsChart');
     const totalReviews = ratingsData.total_reviews || 0;
@@ -187,81 +186,363 @@ async function updateRatingsChart() {
     }
 }
 
-async function renderDashboard() {
-    const refreshBtn = document.getElementById('refreshBtn');
-    refreshBtn.classList.add('loading');
+// ===== Review list: virtual scrolling =====
+// Only the rows inside the viewport (plus OVERSCAN) exist in the DOM. Rows
+// have a fixed height, so a row's position is index * ROW_HEIGHT and pages of
+// PAGE_SIZE are fetched when they scroll into view. Browsers cap element
+// height (Firefox at ~17.9M px, about 60k rows), so past MAX_SPACER_HEIGHT the
+// spacer stops growing and each scrolled pixel moves further down the list.
+// Pages are pinned to the newest review at load time (until=...), and reviews
+// that arrive later are prepended, so page offsets never shift.
+const PAGE_SIZE = 100;
+const ROW_HEIGHT = 300;        // px per row, including the gap
+const ROW_GAP = 16;
+const MAX_SPACER_HEIGHT = 10000000;
+const OVERSCAN = 4;            // extra rows rendered above and below the viewport
+const MAX_NEW_REVIEWS = 200;   // more new reviews than this in one poll: reload instead
+// created_at is set just before the insert commits, so a review can become
+// visible after a newer one. Each poll re-reads this window and skips known ids.
+const POLL_OVERLAP_MS = 15000;
+
+const reviewState = {
+    rows: [],                  // newest first; holes where pages aren't loaded yet
+    total: 0,
+    snapshotAt: null,          // created_at of the newest review at load time
+    newestAt: null,            // created_at of the newest review we have
+    prepended: 0,              // reviews added after the snapshot (before offset 0)
+    knownIds: new Set(),       // ids of every loaded review, to skip overlap repeats
+    loadedPages: new Set(),
+    loadingPages: new Set(),
+    rendered: new Map(),       // review id (or placeholder key) -> row element
+    visible: [0, -1],          // first and last rendered row index
+    generation: 0              // bumped on reload so stale page responses are dropped
+};
+
+function reviewsQuery(params) {
+    return '/admin/reviews?fast=true&' + new URLSearchParams(params).toString();
+}
+
+function createReviewRow(review) {
+    const row = document.createElement('div');
+    row.className = 'review-slot';
+    row.style.height = `${ROW_HEIGHT - ROW_GAP}px`;
+
+    if (!review) {
+        row.innerHTML = `<div class="glass-panel review-card review-placeholder">Loading...</div>`;
+        return row;
+    }
+
+    row.innerHTML = `
+        <div class="glass-panel review-card" style="background: rgba(15, 23, 42, 0.3);">
+            <div class="review-header">
+                <div class="review-rating" style="font-size: 1.2rem;">
+                    ${createStars(review.rating)}
+                    <span style="color:white; font-size:0.9rem; margin-left:8px; font-weight:normal;">${review.rating}/5</span>
+                </div>
+                <div style="font-size: 0.8rem; color: var(--text-secondary);">
+                    ${formatDate(review.created_at)}
+                </div>
+            </div>
+            <div class="clamp-2" style="margin-bottom: 1rem; font-size: 1.1rem; color: white;">"${escapeHtml(review.review_text)}"</div>
+
+            ${review.ai_summary ? `
+            <div class="review-ai-section">
+                <div style="color: var(--accent-color); font-weight: 600; margin-bottom: 4px;">AI Summary</div>
+                <p class="clamp-2">${escapeHtml(review.ai_summary)}</p>
+
+                ${review.ai_recommended_action ? `
+                <div style="color: var(--success-color); font-weight: 600; margin-bottom: 4px; margin-top: 8px;">Recommended Action</div>
+                <p class="clamp-1">${escapeHtml(review.ai_recommended_action)}</p>
+                ` : ''}
+            </div>
+            ` : `<div class="review-ai-section" style="color: var(--text-secondary);">AI analysis pending</div>`}
+        </div>
+    `;
+    // Rows are clamped to a fixed height; the full review opens in the modal
+    row.addEventListener('click', () => showReviewDetail(review));
+    return row;
+}
 
-    // Fetch in parallel
-    const [reviewsData, sentimentData, ratingsData] = await Promise.all([
-        fetchData('/admin/reviews'),
-        fetchData('/analytics/sentiment'),
-        fetchData('/analytics/ratings')
-    ]);
+function showReviewDetail(review) {
+    showModal(`${createStars(review.rating)} ${review.rating}/5`, `
+        <p style="color: var(--text-secondary); margin: 0.5rem 0 1.5rem;">${formatDate(review.created_at)}</p>
+        <div class="glass-panel" style="padding: 1.5rem; margin-bottom: 1rem;">
+            <p style="line-height: 1.8;">"${escapeHtml(review.review_text)}"</p>
+        </div>
+        <div class="glass-panel" style="padding: 1.5rem;">
+            <h3 style="color: var(--accent-color);">AI Summary</h3>
+            <p style="margin: 0.5rem 0 1rem;">${escapeHtml(review.ai_summary || 'Pending')}</p>
+            <h3 style="color: var(--success-color);">Recommended Action</h3>
+            <p style="margin: 0.5rem 0 1rem;">${escapeHtml(review.ai_recommended_action || 'Pending')}</p>
+            <h3 style="color: var(--accent-color);">Response Sent</h3>
+            <p style="margin-top: 0.5rem;">${escapeHtml(review.ai_response || '')}</p>
+        </div>
+    `);
+}
 
-    // Update time
-    document.getElementById('lastUpdated').textContent = `Updated: ${new Date().toLocaleTimeString()}`;
+// Size the spacer for reviewState.total rows. Returns the list pixels per
+// scrolled pixel: 1 until the spacer reaches MAX_SPACER_HEIGHT.
+function updateSpacer(viewport) {
+    const height = reviewState.total * ROW_HEIGHT;
+    const spacerHeight = Math.min(height, MAX_SPACER_HEIGHT);
+    document.getElementById('reviewsSpacer').style.height = `${spacerHeight}px`;
+
+    const range = spacerHeight - viewport.clientHeight;
+    return range > 0 ? Math.max(1, (height - viewport.clientHeight) / range) : 1;
+}
 
-    // Update Stats
-    if (sentimentData) {
-        document.getElementById('sentimentScore').textContent = sentimentData.sentiment_score + '/100';
-        document.getElementById('sentimentLabel').textContent = sentimentData.overall_sentiment;
+function renderVisibleRows() {
+    const viewport = document.getElementById('reviewsList');
+    const spacer = document.getElementById('reviewsSpacer');
+    const status = document.getElementById('reviewsStatus');
+
+    const scale = updateSpacer(viewport);
+    status.textContent = 'No reviews yet.';
+    status.style.display = reviewState.total === 0 ? 'block' : 'none';
+
+    // Position in the full list at the top of the viewport
+    const top = viewport.scrollTop * scale;
+    const shift = Math.round(viewport.scrollTop - top);
+    const first = Math.max(0, Math.floor(top / ROW_HEIGHT) - OVERSCAN);
+    const last = Math.min(
+        reviewState.total - 1,
+        Math.ceil((top + viewport.clientHeight) / ROW_HEIGHT) + OVERSCAN
+    );
+
+    reviewState.visible = [first, last];
+    const visible = new Set();
+    for (let index = first; index <= last; index++) {
+        const review = reviewState.rows[index];
+        const key = review ? review.id : `placeholder-${index}`;
+        if (!review) {
+            loadPage(Math.floor((index - reviewState.prepended) / PAGE_SIZE));
+        }
+
+        let row = reviewState.rendered.get(key);
+        if (!row) {
+            row = createReviewRow(review);
+            reviewState.rendered.set(key, row);
+            spacer.appendChild(row);
+        }
+        // Existing rows are only moved, never rebuilt
+        const offset = `translateY(${index * ROW_HEIGHT + shift}px)`;
+        if (row.style.transform !== offset) row.style.transform = offset;
+        visible.add(key);
     }
 
-    // Update Average Rating
-    if (ratingsData) {
-        const avgRating = ratingsData.average_rating?.toFixed(1) || '-';
-        document.getElementById('averageRating').textContent = avgRating;
+    for (const [key, row] of reviewState.rendered) {
+        if (!visible.has(key)) {
+            row.remove();
+            reviewState.rendered.delete(key);
+        }
     }
+}
 
-    // Render Reviews
-    if (reviewsData && reviewsData.reviews) {
-        document.getElementById('totalReviews').textContent = reviewsData.total_count || reviewsData.reviews.length;
-
-        const list = document.getElementById('reviewsList');
-        list.innerHTML = '';
-
-        if (reviewsData.reviews.length === 0) {
-            list.innerHTML = '<div style="text-align: center; padding: 2rem;">No reviews yet.</div>';
-        } else {
-            reviewsData.reviews.forEach(review => {
-                const item = document.createElement('div');
-                item.className = 'glass-panel review-card';
-                item.style.background = 'rgba(15, 23, 42, 0.3)';
-                item.innerHTML = `
-                    <div class="review-header">
-                        <div class="review-rating" style="font-size: 1.2rem;">
-                            ${createStars(review.rating)} 
-                            <span style="color:white; font-size:0.9rem; margin-left:8px; font-weight:normal;">${review.rating}/5</span>
-                        </div>
-                        <div style="font-size: 0.8rem; color: var(--text-secondary);">
-                            ${formatDate(review.created_at)}
-                        </div>
-                    </div>
-                    <div style="margin-bottom: 1rem; font-size: 1.1rem; color: white;">"${review.review_text || ''}"</div>
-                    
-                    ${review.ai_summary ? `
-                    <div class="review-ai-section">
-                        <div style="color: var(--accent-color); font-weight: 600; margin-bottom: 4px;">AI Summary</div>
-                        <p style="margin-bottom: 8px;">${review.ai_summary}</p>
-                        
-                        ${review.ai_recommended_action ? `
-                        <div style="color: var(--success-color); font-weight: 600; margin-bottom: 4px; margin-top: 12px;">Recommended Action</div>
-                        <p>${review.ai_recommended_action}</p>
-                        ` : ''}
-                    </div>
-                    ` : ''}
-                `;
-                list.appendChild(item);
-            });
+async function loadPage(page) {
+    if (page < 0 || reviewState.loadedPages.has(page) || reviewState.loadingPages.has(page)) return;
+
+    const generation = reviewState.generation;
+    reviewState.loadingPages.add(page);
+    const data = await fetchData(reviewsQuery({
+        limit: PAGE_SIZE,
+        offset: page * PAGE_SIZE,
+        until: reviewState.snapshotAt
+    }));
+    if (generation !== reviewState.generation) return;
+    reviewState.loadingPages.delete(page);
+    if (!data) return;  // retried when the rows are rendered again
+
+    // Position is computed now: reviews may have been prepended meanwhile
+    const base = reviewState.prepended + page * PAGE_SIZE;
+    data.reviews.forEach((review, i) => {
+        reviewState.rows[base + i] = review;
+        reviewState.knownIds.add(review.id);
+    });
+    reviewState.loadedPages.add(page);
+    renderVisibleRows();
+}
+
+// Load the first page from scratch. Returns the number of reviews, or null on error.
+async function resetReviews() {
+    const data = await fetchData(reviewsQuery({ limit: PAGE_SIZE }));
+    if (!data) return null;
+
+    const newestAt = data.reviews.length ? data.reviews[0].created_at : null;
+    Object.assign(reviewState, {
+        rows: data.reviews.slice(),
+        total: data.total_count,
+        snapshotAt: newestAt,
+        newestAt: newestAt,
+        prepended: 0,
+        knownIds: new Set(data.reviews.map(review => review.id)),
+        loadedPages: new Set([0]),
+        loadingPages: new Set(),
+        generation: reviewState.generation + 1
+    });
+    for (const row of reviewState.rendered.values()) row.remove();
+    reviewState.rendered.clear();
+    renderVisibleRows();
+    return reviewState.total;
+}
+
+// created_at is naive UTC; so is the result
+function shiftTimestamp(timestamp, ms) {
+    return new Date(new Date(timestamp + 'Z').getTime() + ms).toISOString().slice(0, -1);
+}
+
+// Same order as the API: created_at, then id, newest first
+function compareReviews(a, b) {
+    if (a.created_at !== b.created_at) return a.created_at < b.created_at ? 1 : -1;
+    return a.id < b.id ? 1 : -1;
+}
+
+// Fetch reviews newer than the newest one shown. Returns how many arrived, or null on error.
+async function pollNewReviews() {
+    if (!reviewState.newestAt) return resetReviews();
+
+    const since = shiftTimestamp(reviewState.newestAt, -POLL_OVERLAP_MS);
+    const data = await fetchData(reviewsQuery({ since, limit: MAX_NEW_REVIEWS }));
+    if (!data) return null;
+    if (data.total_count > data.reviews.length) return resetReviews();
+
+    const fresh = data.reviews.filter(review => !reviewState.knownIds.has(review.id));
+    if (fresh.length === 0) return 0;
+    // A late commit inside the snapshot shifts every page offset after it
+    if (fresh.some(review => review.created_at <= reviewState.snapshotAt)) return resetReviews();
+
+    const viewport = document.getElementById('reviewsList');
+    const count = fresh.length;
+    const top = viewport.scrollTop * updateSpacer(viewport);
+    // Late commits can be older than reviews already prepended, so re-sort that part
+    const prepended = reviewState.rows.slice(0, reviewState.prepended).concat(fresh).sort(compareReviews);
+    reviewState.rows.splice(0, reviewState.prepended, ...prepended);
+    fresh.forEach(review => reviewState.knownIds.add(review.id));
+    reviewState.prepended += count;
+    reviewState.total += count;
+    reviewState.newestAt = prepended[0].created_at;
+
+    // Keep the rows the admin is reading in place unless they're at the top.
+    // Grow the spacer first, or the browser clamps scrollTop to the old height.
+    const scale = updateSpacer(viewport);
+    if (viewport.scrollTop > 0) viewport.scrollTop = (top + count * ROW_HEIGHT) / scale;
+    renderVisibleRows();
+    return count;
+}
+
+// Re-read rendered rows still waiting for AI analysis (degraded mode fills it
+// in later) and rebuild the ones that have it now.
+async function refreshPendingRows() {
+    const [first, last] = reviewState.visible;
+    const ids = new URLSearchParams({ fast: true });
+    for (let index = first; index <= last; index++) {
+        const review = reviewState.rows[index];
+        if (review && !review.ai_summary) ids.append('ids', review.id);
+    }
+    if (!ids.has('ids')) return;
+
+    const data = await fetchData('/admin/reviews?' + ids.toString());
+    if (!data) return;
+    const updated = new Map(
+        data.reviews.filter(review => review.ai_summary).map(review => [review.id, review])
+    );
+    if (updated.size === 0) return;
+
+    // Rows may have moved or scrolled away meanwhile, so look them up again
+    reviewState.rows.forEach((review, index) => {
+        if (review && updated.has(review.id)) {
+            reviewState.rows[index] = updated.get(review.id);
+            reviewState.rendered.get(review.id)?.remove();
+            reviewState.rendered.delete(review.id);
+        }
+    });
+    renderVisibleRows();
+}
+
+let scrollFrame = null;
+document.getElementById('reviewsList').addEventListener('scroll', () => {
+    if (scrollFrame) return;
+    scrollFrame = requestAnimationFrame(() => {
+        scrollFrame = null;
+        renderVisibleRows();
+    });
+});
+
+// ===== Polling =====
+// Each tick only asks for reviews newer than the newest one shown, and for the
+// rows on screen that are still pending AI analysis. Ratings are re-fetched
+// when new reviews arrived; sentiment (an LLM call) at most every
+// SENTIMENT_INTERVAL_MS. Polling stops while the tab is hidden.
+const POLL_INTERVAL_MS = 5000;
+const SENTIMENT_INTERVAL_MS = 60000;
+
+let pollTimer = null;
+let tickInFlight = false;
+let sentimentStale = true;
+let lastSentimentAt = 0;
+
+async function renderDashboard({ full = false } = {}) {
+    if (tickInFlight) return;
+    tickInFlight = true;
+
+    const refreshBtn = document.getElementById('refreshBtn');
+    refreshBtn.classList.add('loading');
+
+    try {
+        const newReviews = full ? await resetReviews() : await pollNewReviews();
+        if (!full) await refreshPendingRows();
+        const changed = full || newReviews > 0;
+        if (changed) sentimentStale = true;
+
+        // Update time
+        document.getElementById('lastUpdated').textContent = `Updated: ${new Date().toLocaleTimeString()}`;
+        document.getElementById('totalReviews').textContent = reviewState.total;
+
+        const sentimentDue = sentimentStale && (full || Date.now() - lastSentimentAt >= SENTIMENT_INTERVAL_MS);
+        // A failed attempt also counts, so errors don't turn into an LLM call per tick
+        if (sentimentDue) lastSentimentAt = Date.now();
+        const [ratingsData, sentimentData] = await Promise.all([
+            changed ? fetchData('/analytics/ratings?include_ratings=false') : null,
+            sentimentDue ? fetchData('/analytics/sentiment') : null
+        ]);
+
+        // Update Stats
+        if (sentimentData) {
+            document.getElementById('sentimentScore').textContent = sentimentData.sentiment_score + '/100';
+            document.getElementById('sentimentLabel').textContent = sentimentData.overall_sentiment;
+            sentimentStale = false;
         }
+
+        // Update Average Rating and chart
+        if (ratingsData) {
+            const avgRating = ratingsData.average_rating?.toFixed(1) || '-';
+            document.getElementById('averageRating').textContent = avgRating;
+            updateRatingsChart(ratingsData);
+        }
+    } finally {
+        refreshBtn.classList.remove('loading');
+        tickInFlight = false;
     }
+}
 
-    // Update chart
-    await updateRatingsChart();
+function startPolling() {
+    if (!pollTimer) pollTimer = setInterval(renderDashboard, POLL_INTERVAL_MS);
+}
 
-    refreshBtn.classList.remove('loading');
+function stopPolling() {
+    clearInterval(pollTimer);
+    pollTimer = null;
 }
 
+// Background tabs generate no backend load; catch up as soon as it's visible again
+document.addEventListener('visibilitychange', () => {
+    if (document.hidden) {
+        stopPolling();
+    } else {
+        renderDashboard();
+        startPolling();
+    }
+});
+
 // Modal functions
 function showModal(title, content) {
     const modal = document.getElementById('analyticsModal');
@@ -388,7 +669,7 @@ async function showRecommendations() {
 }
 
 // Event Listeners
-document.getElementById('refreshBtn').addEventListener('click', renderDashboard);
+document.getElementById('refreshBtn').addEventListener('click', () => renderDashboard({ full: true }));
 document.getElementById('sentimentBtn').addEventListener('click', showSentimentAnalysis);
 document.getElementById('recommendationsBtn').addEventListener('click', showRecommendations);
 document.getElementById('modalClose').addEventListener('click', closeModal);
@@ -401,7 +682,7 @@ document.getElementById('analyticsModal').addEventListener('click', (e) => {
 });
 
 // Initial Load
-renderDashboard();
+renderDashboard({ full: true });
 
-// Auto Refresh every 5 seconds (as requested)
-setInterval(renderDashboard, 5000);
+// Auto Refresh every 5 seconds (as requested) while the tab is visible
+if (!document.hidden) startPolling();
@@ -93,6 +93,79 @@ async function warmupBackend() {
 
 window.addEventListener('DOMContentLoaded', warmupBackend);
 
+async function extractErrorMessage(response) {
+    let errorMsg = `Server Error (${response.status})`;
+    const contentType = response.headers.get("content-type");
+    if (contentType && contentType.includes("application/json")) {
+        const data = await response.json();
+        if (data.detail) {
+            if (typeof data.detail === 'string') errorMsg = data.detail;
+            else if (Array.isArray(data.detail)) errorMsg = data.detail.map(e => e.msg).join(', ');
+            else errorMsg = JSON.stringify(data.detail);
+        }
+    } else {
+        // Handle non-JSON response (e.g. 500 html page)
+        const text = await response.text();
+        console.error("Non-JSON response:", text);
+    }
+    return errorMsg;
+}
+
+// Non-streaming submission (POST /reviews)
+async function submitReviewOnce(rating, reviewText) {
+    const response = await fetch(`${API_URL}/reviews`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ rating, review: reviewText })
+    });
+    if (!response.ok) throw new Error(await extractErrorMessage(response));
+    const data = await response.json();
+    return data.message || 'Thank you for your feedback.';
+}
+
+// Read Server-Sent Events from POST /reviews/stream.
+// Calls onText with the reply so far; resolves with the final reply.
+async function readReplyStream(response, onText) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let reply = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+            if (!data) continue;
+            const payload = JSON.parse(data);
+
+            if (event === 'token') {
+                reply += payload.delta;
+                onText(reply);
+            } else if (event === 'done') {
+                return payload.message || reply || 'Thank you for your feedback.';
+            } else if (event === 'error') {
+                throw new Error(payload.detail || 'Failed to submit');
+            }
+        }
+    }
+
+    if (reply) return reply;
+    throw new Error('Connection closed before the response completed');
+}
+
 document.getElementById('reviewForm').addEventListener('submit', async (e) => {
     e.preventDefault();
 
@@ -138,9 +211,25 @@ document.getElementById('reviewForm').addEventListener('submit', async (e) => {
         }
     }, 4000);
 
+    const showSuccess = (message) => {
+        responseArea.className = 'response-area success';
+        responseTitle.textContent = 'Feedback Summary';
+        responseMessage.textContent = message;
+        responseArea.style.display = 'block';
+    };
+
+    const finishSubmission = () => {
+        form.style.display = 'none';
+        document.querySelector('.rating-group').style.display = 'none';
+        document.querySelector('h1').textContent = 'System Response';
+        document.querySelector('p').textContent = 'Your submission details:';
+
+        form.reset();
+    };
+
     try {
-        console.log("Sending request to:", `${API_URL}/reviews`);
-        const response = await fetch(`${API_URL}/reviews`, {
+        console.log("Sending request to:", `${API_URL}/reviews/stream`);
+        const response = await fetch(`${API_URL}/reviews/stream`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ rating, review: reviewText })
@@ -149,37 +238,19 @@ document.getElementById('reviewForm').addEventListener('submit', async (e) => {
         clearTimeout(slowLoadingTimeout);
         console.log("Response status:", response.status);
 
-        let data;
-        const contentType = response.headers.get("content-type");
-        if (contentType && contentType.includes("application/json")) {
-            data = await response.json();
-        } else {
-            // Handle non-JSON response (e.g. 500 html page)
-            const text = await response.text();
-            console.error("Non-JSON response:", text);
-            throw new Error(`Server Error (${response.status})`);
-        }
-
-        if (response.ok) {
-            responseArea.className = 'response-area success';
-            responseTitle.textContent = 'Feedback Summary';
-            responseMessage.textContent = data.message || 'Thank you for your feedback.';
-
-            form.style.display = 'none';
-            document.querySelector('.rating-group').style.display = 'none';
-            document.querySelector('h1').textContent = 'System Response';
-            document.querySelector('p').textContent = 'Your submission details:';
+        const contentType = response.headers.get("content-type") || '';
 
-            form.reset();
+        if (response.ok && contentType.includes("text/event-stream")) {
+            // Show the AI reply token by token as the model writes it
+            const message = await readReplyStream(response, (text) => showSuccess(text));
+            showSuccess(message);
+            finishSubmission();
+        } else if (response.status === 404) {
+            // Backend without the streaming endpoint
+            showSuccess(await submitReviewOnce(rating, reviewText));
+            finishSubmission();
         } else {
-            // Try to extract useful error message
-            let errorMsg = 'Failed to submit';
-            if (data.detail) {
-                if (typeof data.detail === 'string') errorMsg = data.detail;
-                else if (Array.isArray(data.detail)) errorMsg = data.detail.map(e => e.msg).join(', ');
-                else errorMsg = JSON.stringify(data.detail);
-            }
-            throw new Error(errorMsg);
+            throw new Error(await extractErrorMessage(response));
         }
     } catch (error) {
         console.error("Submission error:", error);